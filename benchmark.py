@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    benchmark.py
+    ------------
+    Date                 : October 2018
+    Copyright            : (C) 2018 by oSvy
+    Email                :
+ benchmarks of the minimum coverage grid computation
+=====================================================
+
+    /***************************************************************************
+     *                                                                         *
+     *   This program is free software; you can redistribute it and/or modify  *
+     *   it under the terms of the GNU General Public License as published by  *
+     *   the Free Software Foundation; either version 2 of the License, or     *
+     *   (at your option) any later version.                                   *
+     *                                                                         *
+     ***************************************************************************/
+
+Runs coverage_grid.py, without QGIS, on deterministic synthetic layers over a
+matrix of parameters, and writes the results as JSON: features and slabs per
+second, intersection tests and peak resident memory of every case. Each case
+runs in a new process, so that its peak memory is its own.
+
+    python benchmark.py --output results.json
+    python benchmark.py --quick --generators coastlines multipolygons
+    python benchmark.py --quick --generators axis_lines --solver 2
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from time import perf_counter
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import numpy as np
+import shapely
+
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from coverage_grid import ( BUFFER_EXACT,
+                            SOLVER_BREAKPOINTS,
+                            SOLVER_EXACT,
+                            ShapelyBackend,
+                            new_statistics,
+                            peak_memory,
+                            serial_grids)
+
+__author__ = 'oSvy'
+__date__ = 'October 2018'
+__copyright__ = '(C) 2018, oSvy'
+__revision__ = '$Format:%H$'
+
+EXTENT = 1000000.0
+FEATURES_DEFAULT = 2000
+SEED_DEFAULT = 0
+SLAB_SIZES = ((7000, 6000), (2000, 1500))
+OVERLAPS = (0, 10)
+NO_BLANKS = (False, True)
+GAPS = (0, 2)
+QUICK_FEATURES = 200
+QUICK_SLAB_SIZES = ((7000, 6000),)
+
+
+def tiny_points(rng, count):
+    """
+    Points: one slab each.
+    """
+    return shapely.points(rng.uniform(0, EXTENT, (count, 2)))
+
+
+def thin_lines(rng, count):
+    """
+    Long thin linestrings, a few slabs to a few tens of slabs long.
+    """
+    starts = rng.uniform(0, EXTENT, (count, 2))
+    angles = rng.uniform(0, 2 * np.pi, count)
+    lengths = rng.uniform(10000, 150000, count)
+    steps = np.linspace(0, 1, 20)
+    lines = []
+    for start, angle, length in zip(starts, angles, lengths):
+        points = start + np.outer(steps * length, (np.cos(angle), np.sin(angle)))
+        lines.append(shapely.linestrings(points + rng.normal(0, 200, points.shape)))
+    return np.array(lines, dtype=object)
+
+
+def axis_lines(rng, count):
+    """
+    Horizontal and vertical lines on integer coordinates, a few slabs long:
+    their bounding boxes are flat.
+    """
+    starts = np.round(rng.uniform(0, EXTENT, (count, 2)))
+    lengths = np.round(rng.uniform(1000, 50000, count))
+    steps = np.where(rng.random(count)[:, None] < 0.5, np.column_stack((lengths, np.zeros(count))), np.column_stack((np.zeros(count), lengths)))
+    return shapely.linestrings(np.stack((starts, starts + steps), axis=1))
+
+
+def convex_polygons(rng, count):
+    """
+    Large convex polygons, about ten slabs across.
+    """
+    polygons = []
+    for center, radius in zip(rng.uniform(0, EXTENT, (count, 2)), rng.uniform(20000, 60000, count)):
+        polygons.append(shapely.convex_hull(shapely.multipoints(center + rng.normal(0, radius / 2.0, (50, 2)))))
+    return np.array(polygons, dtype=object)
+
+
+def coastlines(rng, count, levels=10):
+    """
+    Fractal coastlines: polygons of 2^levels vertices per initial edge, by
+    midpoint displacement of a square.
+    """
+    polygons = []
+    for center, radius in zip(rng.uniform(0, EXTENT, (count, 2)), rng.uniform(10000, 50000, count)):
+        ring = center + radius * np.array([[-1.0, -1.0], [1.0, -1.0], [1.0, 1.0], [-1.0, 1.0], [-1.0, -1.0]])
+        roughness = radius / 4.0
+        for _ in range(levels):
+            middles = (ring[:-1] + ring[1:]) / 2.0
+            normals = (ring[1:] - ring[:-1])[:, ::-1] * (1.0, -1.0)
+            middles += normals * rng.uniform(-0.25, 0.25, (len(middles), 1)) * min(1.0, roughness / radius)
+            refined = np.empty((2 * len(ring) - 1, 2))
+            refined[0::2] = ring
+            refined[1::2] = middles
+            ring = refined
+            roughness /= 2.0
+        polygons.append(shapely.make_valid(shapely.polygons(ring)))
+    return np.array(polygons, dtype=object)
+
+
+def multipolygons(rng, count, parts=100):
+    """
+    Archipelagos: multipolygons of many small islands.
+    """
+    polygons = []
+    for center, radius in zip(rng.uniform(0, EXTENT, (count, 2)), rng.uniform(10000, 50000, count)):
+        islands = shapely.buffer(shapely.points(center + rng.normal(0, radius / 2.0, (parts, 2))), rng.uniform(50, 1000, parts), quad_segs=4)
+        polygons.append(shapely.multipolygons(islands))
+    return np.array(polygons, dtype=object)
+
+
+GENERATORS = {'tiny_points': tiny_points,
+              'thin_lines': thin_lines,
+              'axis_lines': axis_lines,
+              'convex_polygons': convex_polygons,
+              'coastlines': coastlines,
+              'multipolygons': multipolygons}
+
+
+class CountingBackend(ShapelyBackend):
+    """
+    Shapely backend counting the rectangles tested against the geometries.
+    """
+
+    def __init__(self):
+        self.tests = 0
+
+    def intersects(self, geometry, min_x, min_y, max_x, max_y):
+        self.tests += np.size(min_x)
+        return ShapelyBackend.intersects(self, geometry, min_x, min_y, max_x, max_y)
+
+    def dwithin(self, geometry, min_x, min_y, max_x, max_y, distance):
+        self.tests += np.size(min_x)
+        return ShapelyBackend.dwithin(self, geometry, min_x, min_y, max_x, max_y, distance)
+
+
+def run_case(generator, features, seed, options):
+    """
+    Runs one case: generates the layer, then computes its coverage grid in
+    this process. Returns the measures of the case.
+    """
+    geometries = GENERATORS[generator](np.random.default_rng(seed), features)
+    wkbs = shapely.to_wkb(geometries)
+    bboxes = shapely.bounds(geometries)
+    with_geometry = options['no_blank'] or options['gap'] > 0 or options['solver'] == SOLVER_BREAKPOINTS
+    objects = ((index, wkb if with_geometry else None, bbox) for index, (wkb, bbox) in enumerate(zip(wkbs, bboxes.tolist())))
+
+    backend = CountingBackend()
+    statistics = new_statistics()
+    slabs = 0
+    start_time = perf_counter()
+    for keys, grid in serial_grids(objects, options, statistics, backend=backend):
+        slabs += len(grid['id_slab'])
+    elapsed = perf_counter() - start_time
+
+    memory = peak_memory()
+    return {'generator': generator,
+            'features': features,
+            'vertices': int(shapely.get_num_coordinates(geometries).sum()),
+            'options': options,
+            'seconds': elapsed,
+            'features_per_second': features / elapsed if elapsed else None,
+            'slabs': slabs,
+            'slabs_per_second': slabs / elapsed if elapsed else None,
+            'intersection_tests': backend.tests,
+            'peak_rss_mb': memory[0] if memory else None}
+
+
+def cases(generators, slab_sizes, solver, buffer_mode):
+    """
+    Yields the (generator, options) cases of the parameter matrix.
+    """
+    for generator, (slab_dx, slab_dy), overlap, no_blank, gap in product(generators, slab_sizes, OVERLAPS, NO_BLANKS, GAPS):
+        yield generator, {'slab_dx': slab_dx, 'slab_dy': slab_dy, 'overlap': overlap, 'no_blank': no_blank, 'gap': gap,
+                          'solver': solver, 'buffer_mode': buffer_mode}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the minimum coverage grid computation on synthetic layers.')
+    parser.add_argument('--output', help='JSON file of the results (standard output by default)')
+    parser.add_argument('--features', type=int, help='features per layer ({}, {} with --quick)'.format(FEATURES_DEFAULT, QUICK_FEATURES))
+    parser.add_argument('--seed', type=int, default=SEED_DEFAULT, help='seed of the generators')
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS), help='layers to generate')
+    parser.add_argument('--solver', type=int, default=SOLVER_EXACT, help='offset search method (0: exact, 1: occupancy raster, 2: vertex breakpoints)')
+    parser.add_argument('--buffer-mode', type=int, default=BUFFER_EXACT, help='buffer computation (0: exact, 1: simplified, 2: distance test)')
+    parser.add_argument('--quick', action='store_true', help='fewer features and a single slab size')
+    arguments = parser.parse_args(arguments)
+    features = arguments.features or (QUICK_FEATURES if arguments.quick else FEATURES_DEFAULT)
+
+    results = {'python': platform.python_version(),
+               'numpy': np.__version__,
+               'shapely': shapely.__version__,
+               'geos': shapely.geos_version_string,
+               'platform': platform.platform(),
+               'processor': platform.processor(),
+               'cases': []}
+    context = multiprocessing.get_context('spawn')
+    for generator, options in cases(arguments.generators, QUICK_SLAB_SIZES if arguments.quick else SLAB_SIZES, arguments.solver, arguments.buffer_mode):
+        # a new process per case, for its own peak memory
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            case = pool.submit(run_case, generator, features, arguments.seed, options).result()
+        results['cases'].append(case)
+        print('{generator:16} {slab_dx}x{slab_dy} overlap={overlap} no_blank={no_blank:d} gap={gap}: '.format(generator=generator, **options) +
+              '{features_per_second:10.0f} features/s {slabs_per_second:10.0f} slabs/s {intersection_tests:10d} tests'.format(**case), file=sys.stderr)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
+
+# That's all folks!
@@ -0,0 +1,1692 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    coverage_grid.py
+    ----------------
+    Date                 : October 2018
+    Copyright            : (C) 2018 by oSvy
+    Email                : 
+ minimum coverage grid computation shared by the processing scripts
+===================================================================
+
+    /***************************************************************************
+     *                                                                         *
+     *   This program is free software; you can redistribute it and/or modify  *
+     *   it under the terms of the GNU General Public License as published by  *
+     *   the Free Software Foundation; either version 2 of the License, or     *
+     *   (at your option) any later version.                                   *
+     *                                                                         *
+     ***************************************************************************/
+
+The slabs are computed here without QGIS: bounding boxes come in as NumPy
+arrays, slabs go out as NumPy arrays, and the intersection tests run on
+Shapely (GEOS) geometries. The processing scripts are thin wrappers around
+this module, which may also be used from plain Python:
+
+    import numpy as np
+    from coverage_grid import coverage_grid
+    grid = coverage_grid(np.array([[0.0, 0.0, 15000.0, 8000.0]]), 7000, 6000)
+    grid['min_x'], grid['row'], grid['id_slab']
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, floor, sqrt
+from time import perf_counter, time
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import struct
+import sys
+import threading
+import numpy as np
+import shapely
+try:
+    import resource
+except ImportError:    # Windows
+    resource = None
+
+__author__ = 'oSvy'
+__date__ = 'September 2018'
+__copyright__ = '(C) 2018, oSvy'
+__revision__ = '$Format:%H$'
+
+SOLVER_EXACT = 0
+SOLVER_RASTER = 1
+SOLVER_BREAKPOINTS = 2
+GRID_CENTERED = 0
+GRID_GLOBAL = 1
+GRID_SHARED = 2
+GRID_CLUSTERED = 3
+BUFFER_EXACT = 0
+BUFFER_SIMPLIFIED = 1
+BUFFER_DISTANCE = 2
+BUFFER_SEGMENTS = 10
+BUFFER_SIMPLIFY_TOLERANCE = 0.05
+RASTER_CELLS_PER_SLAB = 20
+RASTER_CELLS_MAX = 1 << 23
+SHIFT_BLOCK_SLABS = 1 << 21
+RASTER_EPSILON = 1e-9
+BOUND_EPSILON = 1e-9
+BOUND_TESTS = 64
+BREAKPOINTS_EPSILON = 1e-6
+BREAKPOINTS_GRID_MAX = 48
+BREAKPOINTS_AXIS_MAX = 512
+INTERVALS_SEGMENTS_MAX = 2048
+HOLDING_EPSILON = 1e-9
+HOLDING_VERTICES_PER_SLAB = 4
+CHUNK_SIZE = 256
+STREAM_CHUNK_BYTES = 64 * 1024 * 1024
+PIPELINE_OBJECTS = 2 * CHUNK_SIZE
+PIPELINE_BATCHES = 4
+PIPELINE_POLL = 0.1
+RESULT_SUFFIX = '.gpkg'
+RESULT_PARTIAL_PREFIX = 'partial-'
+RESULT_PARTIAL_AGE = 86400.0
+CACHED_COLUMNS = ('id_object_slab', 'row', 'col', 'min_x', 'min_y', 'max_x', 'max_y', 'format')
+
+# useful fonction
+center_of = lambda a, b : a + (b - a) / 2.0
+
+# so as not to move the slabs out of the bounding of the buffered object when calculating the grid moved to limit
+shift_limit = lambda shift, max_margin : np.clip(shift, -max_margin / 2.0, max_margin / 2.0)
+
+# concatenation of the ranges [0, count) for each count
+ramps = lambda counts : np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def wkb_coordinates(wkb):
+    """
+    Returns the vertices of a WKB geometry as two lists of (n, 2) arrays:
+    points and linestrings first, then polygon rings.
+    """
+    lines = []
+    rings = []
+
+    def read_points(offset, count, byte_order, dimension, target):
+        points = np.frombuffer(wkb, byte_order + 'f8', count * dimension, offset).reshape(count, dimension)[:, :2]
+        points = points[~np.isnan(points).any(axis=1)]
+        if len(points):
+            target.append(points)
+        return offset + count * dimension * 8
+
+    def read_geometry(offset):
+        byte_order = '<' if wkb[offset] == 1 else '>'
+        wkb_type = struct.unpack_from(byte_order + 'I', wkb, offset + 1)[0]
+        offset += 5
+        if wkb_type & 0x20000000:    # EWKB srid
+            offset += 4
+        iso_dimension = (wkb_type & 0xffff) // 1000
+        has_z = bool(wkb_type & 0x80000000) or iso_dimension in (1, 3)
+        has_m = bool(wkb_type & 0x40000000) or iso_dimension in (2, 3)
+        dimension = 2 + has_z + has_m
+        base_type = (wkb_type & 0xffff) % 1000
+        if base_type == 1:           # point
+            return read_points(offset, 1, byte_order, dimension, lines)
+        count = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+        offset += 4
+        if base_type == 2:           # linestring
+            return read_points(offset, count, byte_order, dimension, lines)
+        if base_type == 3:           # polygon
+            for _ in range(count):
+                ring_count = struct.unpack_from(byte_order + 'I', wkb, offset)[0]
+                offset = read_points(offset + 4, ring_count, byte_order, dimension, rings)
+            return offset
+        if base_type in (4, 5, 6, 7):  # multi geometries and collections
+            for _ in range(count):
+                offset = read_geometry(offset)
+            return offset
+        raise ValueError('unsupported WKB geometry type {}'.format(wkb_type))
+
+    read_geometry(0)
+    return lines, rings
+
+
+def occupancy_mask(lines, rings, origin_x, origin_y, cell_x, cell_y, cols, rows):
+    """
+    Rasterizes a geometry given by wkb_coordinates into a (rows, cols) boolean
+    mask of the cells intersecting it: the cells crossed by its segments, plus
+    the cells whose center is inside a polygon.
+    """
+    mask = np.zeros((rows, cols), dtype=bool)
+
+    # vertices, then the cells on both sides of every grid line crossed by a segment
+    for points in lines + rings:
+        cells = [np.floor((points[:, 0] - origin_x) / cell_x), np.floor((points[:, 1] - origin_y) / cell_y)]
+        for axis, origin, size, other_origin, other_size in ((0, origin_x, cell_x, origin_y, cell_y), (1, origin_y, cell_y, origin_x, cell_x)):
+            start = points[:-1]
+            end = points[1:]
+            low = np.minimum(start[:, axis], end[:, axis])
+            high = np.maximum(start[:, axis], end[:, axis])
+            first_line = np.ceil((low - origin) / size)
+            counts = np.where(high > low, np.floor((high - origin) / size) - first_line + 1, 0).astype(np.int64)
+            segment = np.repeat(np.arange(len(start)), counts)
+            line = np.repeat(first_line, counts) + ramps(counts)
+            ratio = (origin + line * size - start[segment, axis]) / (end[segment, axis] - start[segment, axis])
+            other = np.floor((start[segment, 1 - axis] + (end[segment, 1 - axis] - start[segment, 1 - axis]) * ratio - other_origin) / other_size)
+            cells[axis] = np.concatenate((cells[axis], line - 1, line))
+            cells[1 - axis] = np.concatenate((cells[1 - axis], other, other))
+        col = cells[0].astype(np.int64)
+        row = cells[1].astype(np.int64)
+        inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+        mask[row[inside], col[inside]] = True
+
+    # polygon interiors, even-odd scanline at the cells centers
+    toggles = np.zeros((rows, cols + 1), dtype=np.int8)
+    for points in rings:
+        start = points[:-1]
+        end = points[1:]
+        low = np.minimum(start[:, 1], end[:, 1])
+        high = np.maximum(start[:, 1], end[:, 1])
+        first_row = np.clip(np.ceil((low - origin_y) / cell_y - 0.5), 0, rows).astype(np.int64)
+        last_row = np.clip(np.ceil((high - origin_y) / cell_y - 0.5), 0, rows).astype(np.int64)
+        counts = last_row - first_row
+        segment = np.repeat(np.arange(len(start)), counts)
+        row = np.repeat(first_row, counts) + ramps(counts)
+        center_y = origin_y + (row + 0.5) * cell_y
+        x = start[segment, 0] + (center_y - start[segment, 1]) * (end[segment, 0] - start[segment, 0]) / (end[segment, 1] - start[segment, 1])
+        col = np.clip(np.ceil((x - origin_x) / cell_x - 0.5), 0, cols).astype(np.int64)
+        np.add.at(toggles, (row, col), 1)
+    mask |= (np.cumsum(toggles, axis=1, dtype=np.int8)[:, :cols] & 1).astype(bool)
+
+    return mask
+
+
+def summed_area(mask):
+    """
+    Returns the (rows + 1, cols + 1) summed-area table of a (rows, cols) mask:
+    the number of occupied cells below and left of every cell corner.
+    """
+    rows, cols = mask.shape
+    table = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    table[1:, 1:] = mask.cumsum(axis=0, dtype=np.int32).cumsum(axis=1)
+    return table
+
+
+def raster_slab_occupancy(table, origin_x, origin_y, cell_x, cell_y, slab_min_x, slab_min_y, slab_dx, slab_dy, inward=False):
+    """
+    Tells the slabs containing at least one occupied cell of a mask, given by
+    its summed_area table, for every shift. slab_min_x is a (x shifts,
+    slab_count_x) array of the slabs minimum x, slab_min_y a (y shifts,
+    slab_count_y) array of the slabs minimum y; returns a (x shifts, y shifts,
+    slab_count_x, slab_count_y) boolean array. The slabs are rounded outwards
+    to whole cells, or inwards with inward: an occupied cell is then entirely
+    within the slab.
+    """
+    rows, cols = table.shape[0] - 1, table.shape[1] - 1
+
+    # cells covered by each slab
+    first, last = (np.ceil, np.floor) if inward else (np.floor, np.ceil)
+    epsilon = -RASTER_EPSILON if inward else RASTER_EPSILON
+    col_min = np.clip(first((slab_min_x - origin_x) / cell_x + epsilon), 0, cols).astype(np.int64)
+    col_max = np.clip(np.maximum(last((slab_min_x + slab_dx - origin_x) / cell_x - epsilon), col_min), 0, cols).astype(np.int64)
+    row_min = np.clip(first((slab_min_y - origin_y) / cell_y + epsilon), 0, rows).astype(np.int64)
+    row_max = np.clip(np.maximum(last((slab_min_y + slab_dy - origin_y) / cell_y - epsilon), row_min), 0, rows).astype(np.int64)
+
+    c0 = col_min[:, None, :, None]
+    c1 = col_max[:, None, :, None]
+    r0 = row_min[None, :, None, :]
+    r1 = row_max[None, :, None, :]
+    return table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0] > 0
+
+
+def shift_blocks(count_x, count_y, slabs):
+    """
+    Yields the (x shifts, y shifts) slices of the blocks of a count_x × count_y
+    grid of shifts of a grid of slabs, at most SHIFT_BLOCK_SLABS shift × slab
+    pairs each but at least one shift, y blocks first.
+    """
+    block_y = max(1, min(count_y, SHIFT_BLOCK_SLABS // max(slabs, 1)))
+    block_x = max(1, SHIFT_BLOCK_SLABS // (max(slabs, 1) * block_y))
+    for first_y in range(0, count_y, block_y):
+        for first_x in range(0, count_x, block_x):
+            yield slice(first_x, first_x + block_x), slice(first_y, first_y + block_y)
+
+
+def raster_slab_counts(table, origin_x, origin_y, cell_x, cell_y, slab_min_x, slab_min_y, slab_dx, slab_dy, inward=False):
+    """
+    Returns the (x shifts, y shifts) array of the number of slabs of every
+    shift of raster_slab_occupancy, computed by shift_blocks.
+    """
+    counts = np.zeros((len(slab_min_x), len(slab_min_y)), dtype=np.int64)
+    for block_x, block_y in shift_blocks(len(slab_min_x), len(slab_min_y), slab_min_x.shape[1] * slab_min_y.shape[1]):
+        counts[block_x, block_y] = raster_slab_occupancy(table, origin_x, origin_y, cell_x, cell_y, slab_min_x[block_x], slab_min_y[block_y], 
+                                                         slab_dx, slab_dy, inward).sum(axis=(2, 3))
+    return counts
+
+
+def dilate_mask(mask, distance_x, distance_y):
+    """
+    Dilates the mask by a distance given in cells along x and y: a cell becomes
+    occupied when an occupied cell is within the distance of it, measured
+    between the nearest points of both cells.
+    """
+    if distance_x <= 0 or distance_y <= 0:
+        return mask
+    rows, cols = mask.shape
+    table = np.zeros((rows, cols + 1), dtype=np.int64)
+    table[:, 1:] = mask.cumsum(axis=1)
+    columns = np.arange(cols)
+    dilated = np.zeros_like(mask)
+    for step_y in range(min(int(floor(distance_y)) + 2, rows)):
+        # cells step_y rows away are at least step_y - 1 cells apart
+        reach_x = int(floor(distance_x * sqrt(max(0.0, 1.0 - (max(0, step_y - 1) / distance_y)**2)))) + 1
+        spread = table[:, np.minimum(columns + reach_x + 1, cols)] - table[:, np.maximum(columns - reach_x, 0)] > 0
+        dilated[step_y:] |= spread[:rows - step_y]
+        dilated[:rows - step_y] |= spread[step_y:]
+    return dilated
+
+
+def segments(lines, rings):
+    """
+    Returns the segments of a geometry given by wkb_coordinates as (n, 2)
+    arrays of their start and end points, points being segments of no length,
+    and the (n,) boolean array of the segments of polygon rings.
+    """
+    parts = [points[:-1] if len(points) > 1 else points for points in lines + rings]
+    ends = [points[1:] if len(points) > 1 else points for points in lines + rings]
+    if not parts:
+        return np.empty((0, 2)), np.empty((0, 2)), np.empty(0, dtype=bool)
+    ring = np.repeat(np.arange(len(parts)) >= len(lines), [len(points) for points in parts])
+    return np.concatenate(parts), np.concatenate(ends), ring
+
+
+def strip_intervals(start, end, ring, origins, size, count):
+    """
+    Returns the intervals along x of a geometry given by its segments in the
+    count horizontal strips of size from every origin along y, as (strip,
+    min_x, max_x) arrays, the strip i of the origin k being k·count + i: the
+    segments clipped to the strips, and the polygon interiors along the
+    lower edge of the strips, merged. Their union is the projection on x of
+    the geometry within each strip.
+    """
+    segment_count = len(start)
+    origin = np.repeat(origins, segment_count)
+    start = np.tile(start, (len(origins), 1))
+    end = np.tile(end, (len(origins), 1))
+    low = np.minimum(start[:, 1], end[:, 1]) - origin
+    high = np.maximum(start[:, 1], end[:, 1]) - origin
+    strip_first = np.repeat(np.arange(len(origins)) * count, segment_count)
+
+    # the segments clipped to every strip they meet
+    first = np.maximum(np.ceil(low / size - 1), 0).astype(np.int64)
+    last = np.minimum(np.floor(high / size), count - 1).astype(np.int64)
+    counts = np.maximum(last - first + 1, 0)
+    segment = np.repeat(np.arange(len(start)), counts)
+    strip = np.repeat(first, counts) + ramps(counts)
+    rise = end[segment, 1] - start[segment, 1]
+    flat = rise == 0
+    rise[flat] = 1.0
+    bottom = (origin[segment] + strip * size - start[segment, 1]) / rise
+    top = (origin[segment] + (strip + 1) * size - start[segment, 1]) / rise
+    first_x = start[segment, 0] + (end[segment, 0] - start[segment, 0]) * np.where(flat, 0.0, np.clip(np.minimum(bottom, top), 0, 1))
+    last_x = start[segment, 0] + (end[segment, 0] - start[segment, 0]) * np.where(flat, 1.0, np.clip(np.maximum(bottom, top), 0, 1))
+    strip += strip_first[segment]
+
+    # polygon interiors, even-odd along the lower edge of the strips
+    first = np.maximum(np.ceil(low / size), 0).astype(np.int64)
+    last = np.minimum(np.ceil(high / size) - 1, count - 1).astype(np.int64)
+    counts = np.where(np.tile(ring, len(origins)), np.maximum(last - first + 1, 0), 0)
+    crossing = np.repeat(np.arange(len(start)), counts)
+    line = np.repeat(first, counts) + ramps(counts)
+    crossing_x = start[crossing, 0] + (origin[crossing] + line * size - start[crossing, 1]) * \
+        (end[crossing, 0] - start[crossing, 0]) / (end[crossing, 1] - start[crossing, 1])
+    line += strip_first[crossing]
+    order = np.lexsort((crossing_x, line))
+    strip = np.concatenate((strip, line[order][0::2]))
+    low = np.concatenate((np.minimum(first_x, last_x), crossing_x[order][0::2]))
+    high = np.concatenate((np.maximum(first_x, last_x), crossing_x[order][1::2]))
+    if not len(strip):
+        return strip, low, high
+
+    # the overlapping intervals of a strip are merged, the strips being raised above the previous strips
+    order = np.lexsort((low, strip))
+    strip, low, high = strip[order], low[order], high[order]
+    span = high.max() - low.min() + 1.0
+    reach = np.maximum.accumulate(high + strip * span)
+    first = np.ones(len(strip), dtype=bool)
+    first[1:] = (strip[1:] != strip[:-1]) | (low[1:] + strip[1:] * span > reach[:-1])
+    first = np.flatnonzero(first)
+    return strip[first], low[first], np.maximum.reduceat(high, first)
+
+
+def strip_counts(strips, lows, highs, strip_count, origin, size, count, shifts):
+    """
+    Counts the slabs meeting the (strip, min_x, max_x) intervals of
+    strip_intervals in a grid of count slabs of size along x from origin,
+    moved by every shift: returns the (shifts, strip_count) array of the slab
+    counts of every strip.
+    """
+    first = np.clip(np.ceil((lows - origin - shifts[:, None]) / size - 1), 0, count).astype(np.int64)
+    last = np.clip(np.floor((highs - origin - shifts[:, None]) / size), -1, count - 1).astype(np.int64) + 1
+    meets = first < last
+    # the slabs met by the intervals, by differences along every strip
+    rows = (np.arange(len(shifts))[:, None] * strip_count + strips)[meets] * (count + 1)
+    size = len(shifts) * strip_count * (count + 1)
+    marks = np.bincount(rows + first[meets], minlength=size) - np.bincount(rows + last[meets], minlength=size)
+    met = marks.reshape(len(shifts), strip_count, count + 1).cumsum(axis=2)[:, :, :count] > 0
+    return met.sum(axis=2)
+
+
+def interval_counts(start, end, ring, minimum_x, minimum_y, slab_dx, slab_dy, count_x, count_y, shifts_x, shifts_y):
+    """
+    Returns the (shifts_x, shifts_y) array of the number of slabs meeting a
+    geometry given by its segments, for the grids of count_x × count_y slabs
+    from minimum_x, minimum_y moved by every shift. The geometry is cut in
+    strips along the axis with fewer shifts, whose intervals give the slabs
+    of every shift along the other axis, by shift_blocks: the intervals once
+    for every block along y.
+    """
+    if len(shifts_y) > len(shifts_x):
+        return interval_counts(start[:, ::-1], end[:, ::-1], ring, minimum_y, minimum_x, slab_dy, slab_dx, 
+                               count_y, count_x, shifts_y, shifts_x).T
+    counts = np.zeros((len(shifts_x), len(shifts_y)), dtype=np.int64)
+    strips_block = None
+    for block_x, block_y in shift_blocks(len(shifts_x), len(shifts_y), count_x * count_y):
+        if block_y != strips_block:
+            strips_block = block_y
+            strips, lows, highs = strip_intervals(start, end, ring, minimum_y + shifts_y[block_y], slab_dy, count_y)
+        block_count_y = len(shifts_y[block_y])
+        block_counts = strip_counts(strips, lows, highs, block_count_y * count_y, minimum_x, slab_dx, count_x, shifts_x[block_x])
+        counts[block_x, block_y] = block_counts.reshape(-1, block_count_y, count_y).sum(axis=2)
+    return counts
+
+
+class ShapelyBackend:
+    """
+    Geometries and intersection tests with Shapely 2 (GEOS). The methods take
+    single geometries or arrays of geometries, like the Shapely functions. Any
+    object with the same methods may be given as backend.
+    """
+
+    def from_wkb(self, wkb):
+        return shapely.from_wkb(wkb)
+
+    def to_wkb(self, geometry):
+        return shapely.to_wkb(geometry) if geometry is not None else None
+
+    def buffer(self, geometry, distance, segments=BUFFER_SEGMENTS):
+        return shapely.buffer(geometry, distance, quad_segs=segments)
+
+    def simplify(self, geometry, tolerance):
+        return shapely.simplify(geometry, tolerance)
+
+    def prepare(self, geometry):
+        """
+        Returns the geometry prepared for repeated intersection tests.
+        """
+        if geometry is not None:
+            shapely.prepare(geometry)
+        return geometry
+
+    def intersects(self, geometry, min_x, min_y, max_x, max_y):
+        """
+        Returns the boolean array of the rectangles intersecting the geometry.
+        """
+        return shapely.intersects(geometry, shapely.box(min_x, min_y, max_x, max_y))
+
+    def dwithin(self, geometry, min_x, min_y, max_x, max_y, distance):
+        """
+        Returns the boolean array of the rectangles within distance of the geometry.
+        """
+        return shapely.dwithin(geometry, shapely.box(min_x, min_y, max_x, max_y), distance)
+
+    def coordinates(self, geometry):
+        """
+        Returns the (n, 2) array of the vertices of an array of geometries and
+        the (n,) array of the index of their geometry.
+        """
+        return shapely.get_coordinates(geometry, return_index=True)
+
+    def pieces(self, geometry, min_x, min_y, max_x, max_y):
+        """
+        Returns the (k, 4) bounding boxes and the (k,) areas of the connected
+        pieces of the geometry clipped to a rectangle, the area being 0 for an
+        invalid polygon.
+        """
+        pieces = shapely.clip_by_rect(geometry, min_x, min_y, max_x, max_y)
+        while True:
+            pieces = shapely.get_parts(pieces)
+            pieces = pieces[~shapely.is_empty(pieces)]
+            if not np.isin(shapely.get_type_id(pieces), (4, 5, 6, 7)).any():
+                break
+        return shapely.bounds(pieces).reshape(-1, 4), np.where(shapely.is_valid(pieces), shapely.area(pieces), 0.0)
+
+    def parts(self, geometries):
+        """
+        Returns the (k,) indexes of the geometries, the (k, 4) bounding boxes
+        and the (k,) areas of the connected pieces of an array of geometries,
+        the area being 0 for an invalid polygon.
+        """
+        parts, index = geometries, np.arange(len(geometries))
+        while True:
+            parts, part_index = shapely.get_parts(parts, return_index=True)
+            index = index[part_index]
+            kept = ~shapely.is_empty(parts)
+            parts, index = parts[kept], index[kept]
+            if not np.isin(shapely.get_type_id(parts), (4, 5, 6, 7)).any():
+                break
+        return index, shapely.bounds(parts).reshape(-1, 4), np.where(shapely.is_valid(parts), shapely.area(parts), 0.0)
+
+
+def new_statistics():
+    """
+    Returns the statistics of the computation: prepared geometry intersection
+    tests done and time spent in them, and speedup of the prepared tests of a
+    sample object over unprepared tests of the same rectangles;
+    rectangles tested against geometries (GEOS predicate calls), slabs
+    considered and emitted, and the time spent in every phase.
+    """
+    return {'prepared_tests': 0, 'prepared_time': 0.0, 'prepared_speedup': 0.0, 
+            'tests': 0, 'slabs_considered': 0, 'slabs_emitted': 0, 'times': {}}
+
+
+def add_time(statistics, phase, start_time):
+    """
+    Adds the time elapsed since start_time to the time of the phase.
+    """
+    statistics['times'][phase] = statistics['times'].get(phase, 0.0) + perf_counter() - start_time
+
+
+def merge_statistics(statistics, other):
+    """
+    Adds the statistics of other, computed in another process or thread, to
+    statistics.
+    """
+    statistics['prepared_tests'] += other['prepared_tests']
+    statistics['prepared_time'] += other['prepared_time']
+    statistics['prepared_speedup'] = statistics['prepared_speedup'] or other['prepared_speedup']
+    for name in ('tests', 'slabs_considered', 'slabs_emitted'):
+        statistics[name] += other[name]
+    for phase, seconds in other['times'].items():
+        statistics['times'][phase] = statistics['times'].get(phase, 0.0) + seconds
+
+
+def touches(backend, geometry, distance, min_x, min_y, max_x, max_y):
+    """
+    Returns the boolean array of the rectangles intersecting the geometry, or
+    within distance of it when distance (a scalar or an array) is given.
+    """
+    if np.any(distance):
+        return backend.dwithin(geometry, min_x, min_y, max_x, max_y, distance)
+    return backend.intersects(geometry, min_x, min_y, max_x, max_y)
+
+
+def grids(bboxes, slab_dx, slab_dy):
+    """
+    Computes the grids centered on an (n, 4) array of (min_x, min_y, max_x,
+    max_y) bounding boxes. Returns the (n,) arrays slab_count_x, slab_count_y,
+    minimum_x_center, minimum_y_center, max_margin_x and max_margin_y.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    object_dx = bboxes[:, 2] - bboxes[:, 0]
+    object_dy = bboxes[:, 3] - bboxes[:, 1]
+    slab_count_x = np.maximum(1, np.ceil(object_dx / slab_dx)).astype(np.int64)
+    slab_count_y = np.maximum(1, np.ceil(object_dy / slab_dy)).astype(np.int64)
+    minimum_x_center = center_of(bboxes[:, 0], bboxes[:, 2]) - slab_dx * slab_count_x / 2.0
+    minimum_y_center = center_of(bboxes[:, 1], bboxes[:, 3]) - slab_dy * slab_count_y / 2.0
+    max_margin_x = slab_count_x * slab_dx - object_dx
+    max_margin_y = slab_count_y * slab_dy - object_dy
+    return slab_count_x, slab_count_y, minimum_x_center, minimum_y_center, max_margin_x, max_margin_y
+
+
+def grid_slabs(bboxes, slab_dx, slab_dy, shift_x=0.0, shift_y=0.0):
+    """
+    Returns all the slabs of the grids centered on the bounding boxes and moved
+    by shift_x, shift_y (scalars or (n,) arrays, limited to the margins) as the
+    arrays object (index of the bounding box), min_x, min_y, max_x, max_y, row
+    and col (starting at 1), ordered by object, row then col.
+    """
+    slab_count_x, slab_count_y, minimum_x_center, minimum_y_center, max_margin_x, max_margin_y = grids(bboxes, slab_dx, slab_dy)
+    shift_x = shift_limit(np.broadcast_to(shift_x, max_margin_x.shape), max_margin_x)
+    shift_y = shift_limit(np.broadcast_to(shift_y, max_margin_y.shape), max_margin_y)
+
+    counts = slab_count_x * slab_count_y
+    slab_object = np.repeat(np.arange(len(counts)), counts)
+    slab_index = ramps(counts)
+    slab_x = slab_index // slab_count_y[slab_object]
+    slab_y = slab_index % slab_count_y[slab_object]
+    min_x = minimum_x_center[slab_object] + slab_x * slab_dx + shift_x[slab_object]
+    min_y = minimum_y_center[slab_object] + slab_y * slab_dy + shift_y[slab_object]
+    max_x = minimum_x_center[slab_object] + (slab_x + 1) * slab_dx + shift_x[slab_object]
+    max_y = minimum_y_center[slab_object] + (slab_y + 1) * slab_dy + shift_y[slab_object]
+    return slab_object, min_x, min_y, max_x, max_y, slab_x + 1, slab_y + 1
+
+
+def anchored_slabs(bboxes, slab_dx, slab_dy, anchor):
+    """
+    Returns the slabs of the global grid anchored at the (x, y) anchor meeting
+    the bounding boxes, like grid_slabs: row and col start at 1 on the first
+    slab of every object.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    anchor = np.asarray(anchor, dtype=float)
+    first_x = np.floor((bboxes[:, 0] - anchor[0]) / slab_dx).astype(np.int64)
+    first_y = np.floor((bboxes[:, 1] - anchor[1]) / slab_dy).astype(np.int64)
+    slab_count_x = np.maximum(1, np.ceil((bboxes[:, 2] - anchor[0]) / slab_dx).astype(np.int64) - first_x)
+    slab_count_y = np.maximum(1, np.ceil((bboxes[:, 3] - anchor[1]) / slab_dy).astype(np.int64) - first_y)
+
+    counts = slab_count_x * slab_count_y
+    slab_object = np.repeat(np.arange(len(counts)), counts)
+    slab_index = ramps(counts)
+    slab_x = slab_index // slab_count_y[slab_object]
+    slab_y = slab_index % slab_count_y[slab_object]
+    min_x = anchor[0] + (first_x[slab_object] + slab_x) * slab_dx
+    min_y = anchor[1] + (first_y[slab_object] + slab_y) * slab_dy
+    return slab_object, min_x, min_y, min_x + slab_dx, min_y + slab_dy, slab_x + 1, slab_y + 1
+
+
+def cluster_objects(bboxes, width, height):
+    """
+    Groups the objects of an (n, 4) array of bounding boxes into clusters whose
+    extent fits in width × height, with an STR-tree of the boxes: in the order
+    of the boxes, a box not yet grouped starts a cluster, which takes the
+    boxes not yet grouped within reach, nearest first, while its extent still
+    fits. Returns the list of the sorted index arrays of the clusters and the
+    (k, 4) array of their extents.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2.0
+    tree = shapely.STRtree(shapely.box(bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3]))
+    grouped = np.zeros(len(bboxes), dtype=bool)
+    clusters = []
+    extents = []
+    for index in range(len(bboxes)):
+        if grouped[index]:
+            continue
+        grouped[index] = True
+        members = [index]
+        min_x, min_y, max_x, max_y = bboxes[index].tolist()
+        if max_x - min_x <= width and max_y - min_y <= height:
+            candidates = tree.query(shapely.box(max_x - width, max_y - height, min_x + width, min_y + height))
+            candidates = candidates[~grouped[candidates]]
+            candidates = candidates[np.argsort(((centers[candidates] - centers[index])**2).sum(axis=1), kind='stable')]
+            for other in candidates.tolist():
+                other_min_x, other_min_y, other_max_x, other_max_y = bboxes[other].tolist()
+                if max(max_x, other_max_x) - min(min_x, other_min_x) <= width and max(max_y, other_max_y) - min(min_y, other_min_y) <= height:
+                    grouped[other] = True
+                    members.append(other)
+                    min_x, min_y, max_x, max_y = min(min_x, other_min_x), min(min_y, other_min_y), max(max_x, other_max_x), max(max_y, other_max_y)
+        clusters.append(np.sort(members))
+        extents.append((min_x, min_y, max_x, max_y))
+    return clusters, np.array(extents, dtype=float).reshape(-1, 4)
+
+
+def union_wkb(wkbs):
+    """
+    Returns the WKB of the union of WKB geometries, None when they are all null.
+    """
+    wkbs = [wkb for wkb in wkbs if wkb is not None]
+    if len(wkbs) < 2:
+        return wkbs[0] if wkbs else None
+    return shapely.to_wkb(shapely.union_all(shapely.from_wkb(wkbs)))
+
+
+def holding_slabs(coordinates, owner, slab_object, min_x, min_y, row, col, slab_dx, slab_dy, count, limit=HOLDING_VERTICES_PER_SLAB):
+    """
+    Returns the boolean array of the slabs of count objects, ordered by object,
+    row then col, holding one of the (n, 2) coordinates of their object, owner
+    being the sorted (n,) array of the object of every coordinate. Only limit
+    coordinates per slab of an object are used, evenly spaced, and the
+    coordinates within HOLDING_EPSILON of a slab edge are ignored.
+    """
+    held = np.zeros(len(slab_object), dtype=bool)
+    if not len(slab_object):
+        return held
+    counts = np.bincount(slab_object, minlength=count)
+    starts = np.cumsum(counts) - counts
+    first = np.minimum(starts, len(slab_object) - 1)
+    last = np.maximum(starts + counts - 1, 0)
+    count_x = np.where(counts > 0, row[last], 0)
+    count_y = col[last]
+    vertices = np.bincount(owner, minlength=count)
+    stride = np.maximum(1, np.ceil(vertices / np.maximum(limit * counts, 1))).astype(np.int64)
+    sampled = ramps(vertices) % stride[owner] == 0
+    coordinates, owner = coordinates[sampled], owner[sampled]
+    # the position of every coordinate in the grid of its object, in slabs
+    position_x = (coordinates[:, 0] - min_x[first][owner]) / slab_dx
+    position_y = (coordinates[:, 1] - min_y[first][owner]) / slab_dy
+    slab_x = np.floor(position_x)
+    slab_y = np.floor(position_y)
+    inside = (slab_x >= 0) & (slab_x < count_x[owner]) & (slab_y >= 0) & (slab_y < count_y[owner]) & \
+        (np.abs(position_x - slab_x - 0.5) < 0.5 - HOLDING_EPSILON) & (np.abs(position_y - slab_y - 0.5) < 0.5 - HOLDING_EPSILON)
+    held[(starts[owner] + slab_x * count_y[owner] + slab_y)[inside].astype(np.int64)] = True
+    return held
+
+
+def slab_lower_bound(backend, geometry, min_x, min_y, max_x, max_y, slab_dx, slab_dy, distance=0.0):
+    """
+    Returns a lower bound of the number of slabs intersecting the geometry, or
+    within distance of it, for any grid of the (min_x, min_y, max_x, max_y)
+    window: a connected piece of the geometry meets as many slab columns
+    (rows) as its width (height) widened by distance spans at least, and a
+    polygon is covered by its slabs.
+    """
+    if geometry is None:
+        return 0
+    # the window of a horizontal or vertical line is flat, GEOS does not clip to an empty rectangle: it is
+    # widened by a fraction of the slab, that holds no more of the geometry than the window
+    if max_x <= min_x:
+        min_x, max_x = min_x - BOUND_EPSILON * slab_dx, max_x + BOUND_EPSILON * slab_dx
+    if max_y <= min_y:
+        min_y, max_y = min_y - BOUND_EPSILON * slab_dy, max_y + BOUND_EPSILON * slab_dy
+    bounds, areas = backend.pieces(geometry, min_x, min_y, max_x, max_y)
+    if not len(bounds):
+        return 0
+    spans = np.maximum(np.ceil((bounds[:, 2] - bounds[:, 0] + 2 * distance) / slab_dx - BOUND_EPSILON), 
+                       np.ceil((bounds[:, 3] - bounds[:, 1] + 2 * distance) / slab_dy - BOUND_EPSILON))
+    return int(max(1, spans.max(), np.ceil(areas.max() / (slab_dx * slab_dy) - BOUND_EPSILON)))
+
+
+def breakpoint_shifts(coordinates, minimum, slab, max_margin, ends=False, limit=BREAKPOINTS_AXIS_MAX):
+    """
+    Returns the shifts of the grid along an axis to try between its
+    breakpoints: the shifts, within the margins, where a slab edge passes one
+    of the coordinates. One shift per interval between them, in its middle,
+    and with ends also just after its start and just before its end
+    (BREAKPOINTS_EPSILON of the slab). At most limit shifts are kept, evenly
+    spread.
+    """
+    half_margin = max_margin / 2.0
+    if half_margin <= 0 or not len(coordinates):
+        return np.zeros(1)
+    # a slab edge is on the coordinate for the shifts congruent to it modulo the slab size
+    offsets = np.mod(coordinates - minimum + half_margin, slab) - half_margin
+    breakpoints = np.unique(np.concatenate(([-half_margin, half_margin], offsets[offsets < half_margin])))
+    shifts = center_of(breakpoints[:-1], breakpoints[1:])
+    if ends:
+        shifts = np.unique(np.concatenate((np.minimum(breakpoints[:-1] + BREAKPOINTS_EPSILON * slab, shifts), shifts, 
+                                           np.maximum(breakpoints[1:] - BREAKPOINTS_EPSILON * slab, shifts))))
+    if len(shifts) > limit:
+        shifts = shifts[np.unique(np.linspace(0, len(shifts) - 1, limit).round().astype(np.int64))]
+    return shifts
+
+
+def edge_crossings(parts, axis, positions):
+    """
+    Returns the coordinates along axis (0 for x, 1 for y) of the points where
+    the segments of the parts, (n, 2) arrays of vertices, cross the lines of
+    the other axis at positions.
+    """
+    crossings = [np.empty(0)]
+    for points in parts:
+        start = points[:-1]
+        end = points[1:]
+        low = np.minimum(start[:, 1 - axis], end[:, 1 - axis])
+        high = np.maximum(start[:, 1 - axis], end[:, 1 - axis])
+        segment, line = np.nonzero((low[:, None] <= positions) & (positions <= high[:, None]) & (low < high)[:, None])
+        ratio = (positions[line] - start[segment, 1 - axis]) / (end[segment, 1 - axis] - start[segment, 1 - axis])
+        crossings.append(start[segment, axis] + (end[segment, axis] - start[segment, axis]) * ratio)
+    return np.concatenate(crossings)
+
+
+def search_offset(buffer_geom, bbox, slab_dx, slab_dy, gap, solver, backend, statistics, distance=0.0):
+    """
+    Searches the shift of the grid of an object giving the fewest slabs
+    intersecting its buffer, or within distance of it when the buffer is not
+    built, among the (2·gap+1)² multiples of the offset step, or from the
+    breakpoints of the vertices with SOLVER_BREAKPOINTS. Returns the x and y
+    shifts.
+    """
+    slab_count_x, slab_count_y, minimum_x_center, minimum_y_center, max_margin_x, max_margin_y = \
+        (values[0] for values in grids(bbox, slab_dx, slab_dy))
+    wkb = backend.to_wkb(buffer_geom)
+    lines, rings = wkb_coordinates(wkb) if wkb else ([], [])
+    parts = lines + rings
+    vertices = np.concatenate(parts) if parts else np.empty((0, 2))
+    # with distance tests, the slab edges are moved by distance
+    moved = lambda coordinates : np.concatenate((coordinates - distance, coordinates + distance)) if distance else coordinates
+
+    if solver == SOLVER_BREAKPOINTS:
+        # the slab count changes when a slab edge passes a vertex, or when a slab corner crosses a slanted edge:
+        # first the grid of the breakpoints of the vertices, tried in the middle and near both ends of the intervals
+        shifts_x = breakpoint_shifts(moved(vertices[:, 0]), minimum_x_center, slab_dx, max_margin_x, True, BREAKPOINTS_GRID_MAX)
+        shifts_y = breakpoint_shifts(moved(vertices[:, 1]), minimum_y_center, slab_dy, max_margin_y, True, BREAKPOINTS_GRID_MAX)
+    else:
+        # the number of possible offsets is calculated, rounded up to reach the limit,
+        # shifts limited to the margins may be the same
+        gap_x = int(ceil(max_margin_x / 2.0 / gap))
+        gap_y = int(ceil(max_margin_y / 2.0 / gap))
+        shifts_x = np.unique(shift_limit(np.arange(-gap, gap + 1) * gap_x, max_margin_x))
+        shifts_y = np.unique(shift_limit(np.arange(-gap, gap + 1) * gap_y, max_margin_y))
+
+    # slabs minimum and maximum coordinates for every shift, (shifts, slab count) arrays
+    slabs_x = lambda shifts : (minimum_x_center + np.arange(slab_count_x) * slab_dx + shifts[:, None], 
+                               minimum_x_center + np.arange(1, slab_count_x + 1) * slab_dx + shifts[:, None])
+    slabs_y = lambda shifts : (minimum_y_center + np.arange(slab_count_y) * slab_dy + shifts[:, None], 
+                               minimum_y_center + np.arange(1, slab_count_y + 1) * slab_dy + shifts[:, None])
+
+    # the candidate shifts by increasing balance, the squared distance to the centered grid, then in scan order:
+    # the fewest slabs win, then the closest to the centered grid, then the first
+    balanced = lambda shifts_x, shifts_y : np.argsort((shifts_x[:, None]**2 + shifts_y[None, :]**2).ravel(), kind='stable')
+
+    # without distance tests, the slabs of every shift are counted exactly, without GEOS calls, from the
+    # intervals of the buffer in the strips of the slab rows or columns; the cost grows with the segments
+    # for every shift, beyond INTERVALS_SEGMENTS_MAX the prepared intersection tests are faster
+    start, end, ring = segments(lines, rings)
+    intervals = not distance and solver != SOLVER_RASTER and len(start) <= INTERVALS_SEGMENTS_MAX
+    if intervals:
+        lower_bound = slab_lower_bound(backend, buffer_geom, bbox[0], bbox[1], bbox[2], bbox[3], slab_dx, slab_dy)
+
+    if not intervals:
+        # the occupancy raster of the buffer, RASTER_CELLS_PER_SLAB cells per slab; for the raster solver the cells
+        # divide the offset step, so that the slabs of every shift fall on the cells edges
+        cell_x = slab_dx / RASTER_CELLS_PER_SLAB
+        cell_y = slab_dy / RASTER_CELLS_PER_SLAB
+        if solver == SOLVER_RASTER:
+            cell_x = gap_x / ceil(gap_x / cell_x) if gap_x else cell_x
+            cell_y = gap_y / ceil(gap_y / cell_y) if gap_y else cell_y
+        # beyond RASTER_CELLS_MAX cells, the cells are coarser and the slabs rounded outwards to them
+        coarsening = sqrt((slab_count_x * slab_dx + max_margin_x) / cell_x * (slab_count_y * slab_dy + max_margin_y) / cell_y / RASTER_CELLS_MAX)
+        if coarsening > 1:
+            cell_x *= coarsening
+            cell_y *= coarsening
+        origin_x = minimum_x_center - max_margin_x / 2.0
+        origin_y = minimum_y_center - max_margin_y / 2.0
+        mask = occupancy_mask(lines, rings, origin_x, origin_y, cell_x, cell_y, 
+                              int(ceil((slab_count_x * slab_dx + max_margin_x) / cell_x)), 
+                              int(ceil((slab_count_y * slab_dy + max_margin_y) / cell_y)))
+
+    # the raster gives the slab count of every shift at once
+    if solver == SOLVER_RASTER:
+        mask = dilate_mask(mask, distance / cell_x, distance / cell_y)
+        intersect_numbers = raster_slab_counts(summed_area(mask), origin_x, origin_y, cell_x, cell_y, 
+                                               slabs_x(shifts_x)[0], slabs_y(shifts_y)[0], slab_dx, slab_dy)
+        candidates = balanced(shifts_x, shifts_y)
+        best = candidates[np.argmin(intersect_numbers.ravel()[candidates])]
+        return shifts_x[best // len(shifts_y)], shifts_y[best % len(shifts_y)]
+
+    if not intervals:
+        # the slabs of the centered grid of the first object searched are tested unprepared, then prepared, to report the
+        # speedup of the predicate calls alone
+        sampled = not statistics['prepared_speedup']
+        if sampled:
+            rectangles = (np.repeat(minimum_x_center + np.arange(slab_count_x) * slab_dx, slab_count_y), 
+                          np.tile(minimum_y_center + np.arange(slab_count_y) * slab_dy, slab_count_x), 
+                          np.repeat(minimum_x_center + np.arange(1, slab_count_x + 1) * slab_dx, slab_count_y), 
+                          np.tile(minimum_y_center + np.arange(1, slab_count_y + 1) * slab_dy, slab_count_x))
+            start_time = perf_counter()
+            touches(backend, buffer_geom, distance, *rectangles)
+            unprepared_time = perf_counter() - start_time
+        prepared = backend.prepare(buffer_geom)
+        if sampled:
+            start_time = perf_counter()
+            touches(backend, prepared, distance, *rectangles)
+            statistics['prepared_speedup'] = unprepared_time / max(perf_counter() - start_time, 1e-9)
+            statistics['tests'] += 2 * int(slab_count_x * slab_count_y)
+
+        # branch and bound: the slabs holding an occupied cell of the raster intersect the buffer, they give
+        # a lower bound of the count of every shift, the slabs holding no occupied cell, even rounded outwards,
+        # do not, and only the other slabs are tested. The search stops when a shift reaches the lower bound of
+        # all the shifts, a shift is dropped as soon as its known slabs, then its slabs counted so far by blocks
+        # of BOUND_TESTS, reach the best count.
+        # with distance tests, a slab holding a cell within distance of an occupied cell from any of its points
+        # is within distance of the buffer
+        lower_bound = slab_lower_bound(backend, buffer_geom, bbox[0], bbox[1], bbox[2], bbox[3], slab_dx, slab_dy, distance)
+        reach = distance - sqrt(cell_x**2 + cell_y**2)
+        known_table = summed_area(dilate_mask(mask, reach / cell_x, reach / cell_y))
+        possible_table = summed_area(dilate_mask(mask, distance / cell_x, distance / cell_y))
+
+    def fewest_slabs(shifts_x, shifts_y, best_count=None):
+        """
+        Returns the shift of the shifts_x × shifts_y grid with the fewest
+        slabs and its count, or None when none is below best_count.
+        """
+        if intervals:
+            count = lambda shifts_x, shifts_y : interval_counts(start, end, ring, minimum_x_center, minimum_y_center, slab_dx, slab_dy, 
+                                                                slab_count_x, slab_count_y, shifts_x, shifts_y).ravel()
+            candidates = balanced(shifts_x, shifts_y)
+            # the first shift alone, enough when it reaches the lower bound
+            best = candidates[0]
+            first_count = count(shifts_x[best // len(shifts_y):][:1], shifts_y[best % len(shifts_y):][:1])[0]
+            if best_count is None and first_count <= lower_bound:
+                return shifts_x[best // len(shifts_y)], shifts_y[best % len(shifts_y)], first_count
+            counts = count(shifts_x, shifts_y)
+            best = candidates[np.argmin(counts[candidates])]
+            if best_count is not None and counts[best] >= best_count:
+                return None
+            return shifts_x[best // len(shifts_y)], shifts_y[best % len(shifts_y)], counts[best]
+
+        tests = 0
+        slab_min_x, slab_max_x = slabs_x(shifts_x)
+        slab_min_y, slab_max_y = slabs_y(shifts_y)
+        known_counts = raster_slab_counts(known_table, origin_x, origin_y, cell_x, cell_y, slab_min_x, slab_min_y, slab_dx, slab_dy, inward=True)
+        # the slabs of a shift, known or to test, only when it is tried
+        occupancy = lambda table, shift_x, shift_y, inward=False : raster_slab_occupancy(table, origin_x, origin_y, cell_x, cell_y, 
+                                                                                         slab_min_x[shift_x:shift_x + 1], slab_min_y[shift_y:shift_y + 1], 
+                                                                                         slab_dx, slab_dy, inward)[0, 0]
+        best = None
+        for candidate in balanced(shifts_x, shifts_y):
+            if best_count is not None and best_count <= lower_bound:
+                break
+            shift_x, shift_y = divmod(candidate, len(shifts_y))
+            count = known_counts[shift_x, shift_y]
+            if best_count is not None and count >= best_count:
+                continue
+
+            untested_x, untested_y = np.nonzero(occupancy(possible_table, shift_x, shift_y) & ~occupancy(known_table, shift_x, shift_y, True))
+            for first in range(0, len(untested_x), BOUND_TESTS):
+                block_x = untested_x[first:first + BOUND_TESTS]
+                block_y = untested_y[first:first + BOUND_TESTS]
+                start_time = perf_counter()
+                count += touches(backend, prepared, distance, 
+                                 slab_min_x[shift_x, block_x], slab_min_y[shift_y, block_y], 
+                                 slab_max_x[shift_x, block_x], slab_max_y[shift_y, block_y]).sum()
+                statistics['prepared_time'] += perf_counter() - start_time
+                tests += len(block_x)
+                if best_count is not None and count >= best_count:
+                    break
+            else:
+                best = (shifts_x[shift_x], shifts_y[shift_y], count)
+                best_count = count
+        statistics['prepared_tests'] += tests
+        statistics['tests'] += tests
+        return best
+
+    shift_x, shift_y, count = fewest_slabs(shifts_x, shifts_y)
+
+    # then along one axis at a time, the other shift being fixed, the slab count only changes when a slab edge
+    # passes a vertex or a point where an edge crosses the slab edges of the other axis: without distance tests
+    # and up to BREAKPOINTS_AXIS_MAX intervals, the search along an axis is exact. It is repeated until neither
+    # axis gives fewer slabs.
+    improved = solver == SOLVER_BREAKPOINTS
+    while improved and count > lower_bound:
+        improved = False
+        edges_y = moved(minimum_y_center + shift_y + np.arange(slab_count_y + 1) * slab_dy)
+        coordinates = np.concatenate((vertices[:, 0], edge_crossings(parts, 0, edges_y)))
+        best = fewest_slabs(breakpoint_shifts(moved(coordinates), minimum_x_center, slab_dx, max_margin_x), np.array([shift_y]), count)
+        if best:
+            shift_x, shift_y, count = best
+            improved = True
+        edges_x = moved(minimum_x_center + shift_x + np.arange(slab_count_x + 1) * slab_dx)
+        coordinates = np.concatenate((vertices[:, 1], edge_crossings(parts, 1, edges_x)))
+        best = fewest_slabs(np.array([shift_x]), breakpoint_shifts(moved(coordinates), minimum_y_center, slab_dy, max_margin_y), count)
+        if best:
+            shift_x, shift_y, count = best
+            improved = True
+
+    return shift_x, shift_y
+
+
+def object_buffers(backend, geoms, bboxes, overlap, buffer_mode=BUFFER_EXACT, buffer_segments=BUFFER_SEGMENTS, object_times=None):
+    """
+    Returns the overlap buffers of an array of geometries and the (n,) array of
+    the distances still to test around them: the overlap distances with
+    BUFFER_DISTANCE, zeros otherwise. With object_times, the buffers are built
+    one object at a time and their times added to it.
+    """
+    distances = np.zeros(len(bboxes))
+    if overlap > 0:    # if a buffer must extend object
+        distances = overlap / 100.0 * np.maximum(bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1])
+    if overlap > 0 and buffer_mode != BUFFER_DISTANCE:
+        build = lambda geoms, dist : backend.buffer(backend.simplify(geoms, dist * BUFFER_SIMPLIFY_TOLERANCE) if buffer_mode == BUFFER_SIMPLIFIED else geoms, 
+                                                    dist, buffer_segments)
+        if object_times is not None:
+            geoms = geoms.copy()
+            for index in range(len(bboxes)):
+                object_time = perf_counter()
+                geoms[index:index + 1] = build(geoms[index:index + 1], distances[index:index + 1])
+                object_times[index] += perf_counter() - object_time
+        else:
+            geoms = build(geoms, distances)
+        distances = np.zeros(len(bboxes))
+    return geoms, distances
+
+
+def coverage_grid(bboxes, slab_dx, slab_dy, geometries=None, overlap=0, no_blank=False, gap=0, solver=SOLVER_EXACT, 
+                  buffer_mode=BUFFER_EXACT, buffer_segments=BUFFER_SEGMENTS, anchor=None, formats=None, buffers=None, profile=False, 
+                  backend=None, statistics=None):
+    """
+    Computes the minimum coverage grid of the objects of an (n, 4) array of
+    (min_x, min_y, max_x, max_y) bounding boxes. geometries, a sequence of n
+    WKB geometries, is only needed with no_blank, gap or SOLVER_BREAKPOINTS.
+    The overlap buffer is built with buffer_segments segments per quarter
+    circle, on the geometries simplified by BUFFER_SIMPLIFY_TOLERANCE of the
+    distance with BUFFER_SIMPLIFIED, or replaced by distance tests with
+    BUFFER_DISTANCE. With an (x, y) anchor, the slabs are those of the
+    global grid anchored there meeting the bounding boxes, and are not
+    shifted. Otherwise, with a sequence of (slab_dx, slab_dy) formats, every
+    object gets the format giving it the fewest slabs (see format_grid).
+    buffers, the array of the buffers of object_buffers when they are built
+    already, replaces their computation.
+    Returns a dict of arrays, one value per slab: 'id_object' (index of the
+    bounding box), 'id_slab', 'id_object_slab', 'row', 'col' (starting at 1),
+    'min_x', 'min_y', 'max_x', 'max_y' and 'format' (index of the format, 0
+    without formats). With profile, the buffers are built
+    one object at a time and 'object_time' gives the buffer and offset search
+    time of every object.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    backend = backend or ShapelyBackend()
+    statistics = new_statistics() if statistics is None else statistics
+    if formats is not None and len(formats) > 1 and anchor is None:
+        return format_grid(bboxes, formats, geometries, overlap=overlap, no_blank=no_blank, gap=gap, solver=solver, buffer_mode=buffer_mode, 
+                           buffer_segments=buffer_segments, profile=profile, backend=backend, statistics=statistics)
+
+    # can we try to optimize the number of slabs?
+    slab_count_x, slab_count_y = grids(bboxes, slab_dx, slab_dy)[:2]
+    optimized = np.flatnonzero(slab_count_x * slab_count_y > 2) if (gap or solver == SOLVER_BREAKPOINTS) and anchor is None else np.empty(0, dtype=np.int64)
+    shift_x = np.zeros(len(bboxes))
+    shift_y = np.zeros(len(bboxes))
+    object_times = np.zeros(len(bboxes))
+    if no_blank or len(optimized):
+        if geometries is None:
+            raise ValueError('geometries are needed to remove blank slabs or to shift the grids')
+        start_time = perf_counter()
+        buffer_geoms = backend.from_wkb(np.array(geometries, dtype=object))
+        object_geoms = buffer_geoms.copy()
+        add_time(statistics, 'geometry parsing', start_time)
+
+        start_time = perf_counter()
+        if buffers is None:
+            buffer_geoms, distances = object_buffers(backend, buffer_geoms, bboxes, overlap, buffer_mode, buffer_segments, 
+                                                     object_times if profile else None)
+        else:
+            buffer_geoms, distances = buffers, np.zeros(len(bboxes))
+        add_time(statistics, 'buffer', start_time)
+
+        start_time = perf_counter()
+        for index in optimized:
+            object_time = perf_counter()
+            shift_x[index], shift_y[index] = search_offset(buffer_geoms[index], bboxes[index], slab_dx, slab_dy, gap, solver, backend, statistics, distances[index])
+            object_times[index] += perf_counter() - object_time
+        add_time(statistics, 'offset search', start_time)
+
+    # we found the position of the slabs, we can now create the grids, all at once
+    start_time = perf_counter()
+    if anchor is None:
+        slab_object, min_x, min_y, max_x, max_y, row, col = grid_slabs(bboxes, slab_dx, slab_dy, shift_x, shift_y)
+    else:
+        slab_object, min_x, min_y, max_x, max_y, row, col = anchored_slabs(bboxes, slab_dx, slab_dy, anchor)
+    add_time(statistics, 'rectangles', start_time)
+    statistics['slabs_considered'] += len(slab_object)
+
+    # intersection with the buffers
+    if no_blank:
+        start_time = perf_counter()
+        # the slabs holding a vertex of their object meet its buffer, only the others are tested, against the prepared
+        # buffers, whose segments are indexed
+        coordinates, owner = backend.coordinates(object_geoms)
+        tested = ~holding_slabs(coordinates, owner, slab_object, min_x, min_y, row, col, slab_dx, slab_dy, len(bboxes))
+        tested_object = slab_object[tested]
+        backend.prepare(buffer_geoms[np.unique(tested_object)])
+        keep = np.ones(len(slab_object), dtype=bool)
+        keep[tested] = touches(backend, buffer_geoms[tested_object], distances[tested_object], min_x[tested], min_y[tested], max_x[tested], max_y[tested])
+        slab_object, min_x, min_y, max_x, max_y, row, col = (values[keep] for values in (slab_object, min_x, min_y, max_x, max_y, row, col))
+        add_time(statistics, 'intersection tests', start_time)
+        statistics['tests'] += len(tested_object)
+    statistics['slabs_emitted'] += len(slab_object)
+
+    grid = {'id_object': slab_object, 
+            'id_slab': np.arange(1, len(slab_object) + 1), 
+            'id_object_slab': ramps(np.bincount(slab_object, minlength=len(bboxes))) + 1, 
+            'row': row, 
+            'col': col, 
+            'min_x': min_x, 
+            'min_y': min_y, 
+            'max_x': max_x, 
+            'max_y': max_y, 
+            'format': np.zeros(len(slab_object), dtype=np.int64)}
+    if profile:
+        grid['object_time'] = object_times
+    return grid
+
+
+def format_grid(bboxes, formats, geometries=None, overlap=0, no_blank=False, gap=0, solver=SOLVER_EXACT, buffer_mode=BUFFER_EXACT, 
+                buffer_segments=BUFFER_SEGMENTS, profile=False, backend=None, statistics=None):
+    """
+    Computes the coverage grid of the objects of an (n, 4) array of bounding
+    boxes, every object getting the format of the sequence of (slab_dx,
+    slab_dy) formats that gives it the fewest slabs, the first one on a tie,
+    the other arguments being those of coverage_grid. Without slab removal
+    nor shift, the slab counts are those of the full grids. Otherwise the
+    buffers are built once for all the formats, the formats of an object are
+    computed by increasing lower bound of their slab count, from the connected
+    pieces of its geometry, and those whose bound cannot give fewer slabs than
+    the best format found are skipped. Returns the grid of coverage_grid, 'format'
+    being the index of the format of the slab.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    backend = backend or ShapelyBackend()
+    statistics = new_statistics() if statistics is None else statistics
+    formats = np.asarray(formats, dtype=float).reshape(-1, 2)
+    count = len(bboxes)
+    if not count:
+        return coverage_grid(bboxes, formats[0, 0], formats[0, 1], geometries, overlap=overlap, no_blank=no_blank, gap=gap, solver=solver, 
+                             buffer_mode=buffer_mode, buffer_segments=buffer_segments, profile=profile, backend=backend, statistics=statistics)
+
+    # slab counts of the full grids, the exact counts without slab removal nor shift, otherwise the upper bounds
+    full = np.array([np.prod(grids(bboxes, slab_dx, slab_dy)[:2], axis=0) for slab_dx, slab_dy in formats]).reshape(-1, count)
+    lower = full.copy()
+    object_times = np.zeros(count)
+    buffers = None
+    if no_blank or gap or solver == SOLVER_BREAKPOINTS:
+        if geometries is None:
+            raise ValueError('geometries are needed to remove blank slabs or to shift the grids')
+        start_time = perf_counter()
+        geoms = backend.from_wkb(np.array(geometries, dtype=object))
+        add_time(statistics, 'geometry parsing', start_time)
+        if overlap > 0 and buffer_mode != BUFFER_DISTANCE:
+            start_time = perf_counter()
+            buffers = object_buffers(backend, geoms, bboxes, overlap, buffer_mode, buffer_segments, object_times if profile else None)[0]
+            add_time(statistics, 'buffer', start_time)
+
+        start_time = perf_counter()
+        # for all the objects and formats at once: the slabs meeting a connected piece spanning columns x rows are
+        # joined by their sides, and at least columns + rows - 1; the slabs meeting an object meet its buffer
+        owner, bounds, areas = backend.parts(geoms)
+        for format_index, (slab_dx, slab_dy) in enumerate(formats):
+            columns = np.maximum(1, np.ceil((bounds[:, 2] - bounds[:, 0]) / slab_dx - BOUND_EPSILON))
+            rows = np.maximum(1, np.ceil((bounds[:, 3] - bounds[:, 1]) / slab_dy - BOUND_EPSILON))
+            spans = np.maximum(columns + rows - 1, np.ceil(areas / (slab_dx * slab_dy) - BOUND_EPSILON)).astype(np.int64)
+            bound = np.zeros(count, dtype=np.int64)
+            np.maximum.at(bound, owner, spans)
+            lower[format_index] = np.minimum(bound, full[format_index])
+        add_time(statistics, 'format bounds', start_time)
+
+    # formats by increasing lower bound, then full grid count, then order, computed a round at a time
+    candidates = np.lexsort((np.broadcast_to(np.arange(len(formats))[:, None], full.shape), full, lower), axis=0)
+    best_count = np.full(count, np.iinfo(np.int64).max)
+    best_format = np.zeros(count, dtype=np.int64)
+    computed = []
+    for tried in candidates:
+        bound = lower[tried, np.arange(count)]
+        pending = (bound < best_count) | ((bound == best_count) & (tried < best_format))
+        for format_index in np.unique(tried[pending]):
+            objects = np.flatnonzero(pending & (tried == format_index))
+            grid = coverage_grid(bboxes[objects], formats[format_index, 0], formats[format_index, 1], 
+                                 None if geometries is None else [geometries[index] for index in objects], overlap=overlap, 
+                                 no_blank=no_blank, gap=gap, solver=solver, buffer_mode=buffer_mode, buffer_segments=buffer_segments, 
+                                 buffers=None if buffers is None else buffers[objects], profile=profile, backend=backend, 
+                                 statistics=statistics)
+            counts = np.bincount(grid['id_object'], minlength=len(objects))
+            better = (counts < best_count[objects]) | ((counts == best_count[objects]) & (format_index < best_format[objects]))
+            best_count[objects[better]] = counts[better]
+            best_format[objects[better]] = format_index
+            if profile:
+                object_times[objects] += grid['object_time']
+            computed.append((format_index, objects, grid))
+
+    # slabs of the best formats, by object
+    parts = []
+    for format_index, objects, grid in computed:
+        slab_object = objects[grid['id_object']]
+        keep = best_format[slab_object] == format_index
+        part = {column: grid[column][keep] for column in ('row', 'col', 'min_x', 'min_y', 'max_x', 'max_y')}
+        part['id_object'] = slab_object[keep]
+        parts.append(part)
+    order = np.argsort(np.concatenate([part['id_object'] for part in parts]), kind='stable')
+    grid = {column: np.concatenate([part[column] for part in parts])[order] for column in ('id_object', 'row', 'col', 'min_x', 'min_y', 'max_x', 'max_y')}
+    grid['id_slab'] = np.arange(1, len(order) + 1)
+    grid['id_object_slab'] = ramps(np.bincount(grid['id_object'], minlength=count)) + 1
+    grid['format'] = best_format[grid['id_object']]
+    # the slabs of the other formats were not emitted
+    statistics['slabs_emitted'] -= sum(len(computed_grid['id_slab']) for format_index, objects, computed_grid in computed) - len(order)
+    if profile:
+        grid['object_time'] = object_times
+    return grid
+
+
+def chunks(objects, chunk_size=CHUNK_SIZE, chunk_bytes=None):
+    """
+    Groups (key, wkb, bbox) objects into (keys, wkbs, bboxes) chunks of at most
+    chunk_size objects and, if chunk_bytes is given, at most chunk_bytes of WKB
+    (an object larger than chunk_bytes makes a chunk alone).
+    """
+    chunk = ([], [], [])
+    size = 0
+    for key, wkb, bbox in objects:
+        chunk[0].append(key)
+        chunk[1].append(wkb)
+        chunk[2].append(bbox)
+        size += len(wkb) if wkb else 0
+        if len(chunk[0]) == chunk_size or (chunk_bytes and size >= chunk_bytes):
+            yield chunk
+            chunk = ([], [], [])
+            size = 0
+    if chunk[0]:
+        yield chunk
+
+
+def chunk_grid(wkbs, bboxes, options):
+    """
+    Worker process entry: computes the coverage grid of a chunk of objects,
+    options being the keyword arguments of coverage_grid. Returns the grid and
+    the statistics of the chunk.
+    """
+    statistics = new_statistics()
+    grid = coverage_grid(bboxes, geometries=wkbs, statistics=statistics, **options)
+    return grid, statistics
+
+
+def process_pool(workers):
+    """
+    Returns a pool of worker processes. Within QGIS, the running executable
+    is QGIS itself: the workers are started with the python interpreter.
+    """
+    context = multiprocessing.get_context('spawn')
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        context.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe') if os.name == 'nt' else os.path.join(sys.exec_prefix, 'bin', 'python3'))
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+
+def parallel_grids(pool, workers, objects, options, statistics, chunk_bytes=None):
+    """
+    Computes in the worker processes of pool the coverage grids of chunks of
+    (key, wkb, bbox) objects, options being the keyword arguments of
+    coverage_grid (slab_dx, slab_dy, overlap...), and yields the (keys, grid) pairs in the order of
+    objects. The keys stay in this process; two chunks per worker at most are
+    pending, chunk_bytes bounds the WKB size of a chunk.
+    """
+    pending = deque()
+
+    def collect():
+        keys, future = pending.popleft()
+        grid, chunk_statistics = future.result()
+        merge_statistics(statistics, chunk_statistics)
+        return keys, grid
+
+    try:
+        for keys, wkbs, bboxes in chunks(objects, chunk_bytes=chunk_bytes):
+            pending.append((keys, pool.submit(chunk_grid, wkbs, bboxes, options)))
+            while len(pending) > 2 * workers:
+                yield collect()
+        while pending:
+            yield collect()
+    finally:
+        for keys, future in pending:
+            future.cancel()
+
+
+def serial_grids(objects, options, statistics, backend=None, chunk_bytes=None):
+    """
+    Computes in this process the coverage grids of chunks of (key, wkb, bbox)
+    objects, options being the keyword arguments of coverage_grid, and yields the (keys, grid) pairs in the order of objects,
+    chunk_bytes bounds the WKB size of a chunk.
+    """
+    for keys, wkbs, bboxes in chunks(objects, chunk_bytes=chunk_bytes):
+        yield keys, coverage_grid(bboxes, geometries=wkbs, backend=backend, statistics=statistics, **options)
+
+
+def options_key(options):
+    """
+    Returns the text identifying the options of the slabs kept between runs,
+    by the incremental cache and the checkpoint: profiling does not change
+    the slabs.
+    """
+    return json.dumps({name: value for name, value in options.items() if name != 'profile'}, sort_keys=True)
+
+
+def geometry_hash(wkb, bbox):
+    """
+    Returns the hash identifying the geometry of an object, or its bounding box
+    when the WKB is not needed.
+    """
+    return hashlib.sha1(wkb if wkb is not None else struct.pack('<4d', *bbox)).digest()
+
+
+def object_slabs(grid, count):
+    """
+    Splits a grid of count objects into (slabs, len(CACHED_COLUMNS)) arrays, one
+    per object.
+    """
+    values = np.column_stack([grid[column] for column in CACHED_COLUMNS]).astype(float)
+    return np.split(values, np.cumsum(np.bincount(grid['id_object'], minlength=count))[:-1])
+
+
+def slabs_grid(slabs):
+    """
+    Returns the grid of objects given by their arrays of object_slabs.
+    """
+    values = np.concatenate(slabs) if slabs else np.empty((0, len(CACHED_COLUMNS)))
+    grid = {column: values[:, index] for index, column in enumerate(CACHED_COLUMNS)}
+    for column in ('id_object_slab', 'row', 'col', 'format'):
+        grid[column] = grid[column].astype(np.int64)
+    grid['id_object'] = np.repeat(np.arange(len(slabs)), [len(values) for values in slabs])
+    grid['id_slab'] = np.arange(1, len(values) + 1)
+    return grid
+
+
+class GridCache:
+    """
+    Sidecar SQLite cache of the slabs of the objects, for incremental runs. The
+    slabs are stored by feature id with the hash of the geometry and the
+    coverage_grid options: an object whose geometry and options are unchanged
+    since the last run is read back instead of computed.
+    """
+
+    def __init__(self, path, options):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS slabs (options TEXT, fid INTEGER, hash BLOB, run INTEGER, slabs BLOB, PRIMARY KEY (options, fid))')
+        self.options = options_key(options)
+        self.run = (self.connection.execute('SELECT max(run) FROM slabs').fetchone()[0] or 0) + 1
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, fids, hashes):
+        """
+        Returns the cached slabs of the objects, None for the objects to compute.
+        """
+        rows = {fid: (hash, slabs) for fid, hash, slabs in self.connection.execute(
+            'SELECT fid, hash, slabs FROM slabs WHERE options = ? AND fid IN ({})'.format(', '.join('?' * len(fids))), [self.options] + list(fids))}
+        found = [np.frombuffer(rows[fid][1]).reshape(-1, len(CACHED_COLUMNS)) if fid in rows and rows[fid][0] == hash else None 
+                 for fid, hash in zip(fids, hashes)]
+        hits = [(self.run, self.options, fid) for fid, slabs in zip(fids, found) if slabs is not None]
+        self.connection.executemany('UPDATE slabs SET run = ? WHERE options = ? AND fid = ?', hits)
+        self.hits += len(hits)
+        self.misses += len(fids) - len(hits)
+        return found
+
+    def store(self, fids, hashes, slabs):
+        self.connection.executemany('INSERT OR REPLACE INTO slabs VALUES (?, ?, ?, ?, ?)', 
+                                    [(self.options, fid, hash, self.run, values.tobytes()) for fid, hash, values in zip(fids, hashes, slabs)])
+
+    def prune(self):
+        """
+        Drops the objects of the options not met during a complete run: deleted features.
+        """
+        self.connection.execute('DELETE FROM slabs WHERE options = ? AND run <> ?', (self.options, self.run))
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def cached_grids(objects, cache, compute, fid_of, chunk_bytes=None):
+    """
+    Yields the (keys, grid) pairs of (key, wkb, bbox) objects in their order,
+    like serial_grids or parallel_grids, by chunks of at most CHUNK_SIZE
+    objects. The slabs of the objects found in cache are read from it, the
+    other objects are given to compute, which yields their (keys, grid) pairs,
+    and stored. fid_of returns the feature id of a key. At most about
+    CHUNK_SIZE objects read from the cache wait for the objects computed
+    before them: compute is then given no more objects, and started again
+    once they are yielded.
+    """
+    # objects in their order, with their cached slabs or None until computed
+    order = deque()
+    computing = deque()
+    exhausted = False
+
+    def looked_up():
+        for keys, wkbs, bboxes in chunks(objects, chunk_bytes=chunk_bytes):
+            fids = [fid_of(key) for key in keys]
+            hashes = [geometry_hash(wkb, bbox) for wkb, bbox in zip(wkbs, bboxes)]
+            yield from zip(keys, fids, hashes, wkbs, bboxes, cache.lookup(fids, hashes))
+
+    found = looked_up()
+
+    def missing():
+        nonlocal exhausted
+        for key, fid, hash, wkb, bbox, slabs in found:
+            entry = [key, slabs]
+            order.append(entry)
+            if slabs is None:
+                computing.append((fid, hash, entry))
+                yield key, wkb, bbox
+            elif len(order) - len(computing) >= CHUNK_SIZE:
+                return
+        exhausted = True
+
+    def ready():
+        # the objects known up to the first one still to compute
+        while order and order[0][1] is not None:
+            keys = []
+            slabs = []
+            while order and order[0][1] is not None and len(keys) < CHUNK_SIZE:
+                key, values = order.popleft()
+                keys.append(key)
+                slabs.append(values)
+            yield keys, slabs_grid(slabs)
+
+    while not exhausted:
+        results = compute(missing())
+        try:
+            for keys, grid in results:
+                computed = [computing.popleft() for key in keys]
+                slabs = object_slabs(grid, len(keys))
+                cache.store([fid for fid, hash, entry in computed], [hash for fid, hash, entry in computed], slabs)
+                for (fid, hash, entry), values in zip(computed, slabs):
+                    entry[1] = values
+                yield from ready()
+        finally:
+            results.close()
+        # the objects read from the cache after the last one computed
+        yield from ready()
+    cache.prune()
+
+
+class CheckpointError(ValueError):
+    """
+    The objects do not match those committed to a checkpoint.
+    """
+
+
+class Checkpoint:
+    """
+    SQLite checkpoint of a long run: the slabs of the objects are committed by
+    chunks, in their order, with the hash of their geometry, and the progress
+    (objects and slabs committed, last feature id) is updated in the same
+    transaction, so that a canceled or crashed run resumes after the last
+    committed chunk. The checkpoint of other options, or of a finished run, is
+    started again.
+    """
+
+    def __init__(self, path, options):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS progress (options TEXT, objects INTEGER, last_fid INTEGER, slabs INTEGER, finished INTEGER)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS slabs (position INTEGER PRIMARY KEY, fid INTEGER, hash BLOB, slabs BLOB)')
+        options = options_key(options)
+        progress = self.connection.execute('SELECT options, objects, last_fid, slabs, finished FROM progress').fetchone()
+        if progress is None or progress[0] != options or progress[4]:
+            with self.connection:
+                self.connection.execute('DELETE FROM progress')
+                self.connection.execute('DELETE FROM slabs')
+                self.connection.execute('INSERT INTO progress VALUES (?, 0, NULL, 0, 0)', (options,))
+            progress = (options, 0, None, 0, 0)
+        self.objects, self.last_fid, self.slabs = progress[1:4]
+        # the progress of the previous runs
+        self.resumed_objects = self.objects
+        self.resumed_slabs = self.slabs
+
+    def read(self, position, count):
+        """
+        Returns the (fid, hash, slabs) of count committed objects from position.
+        """
+        return [(fid, hash, np.frombuffer(slabs).reshape(-1, len(CACHED_COLUMNS))) for fid, hash, slabs in self.connection.execute(
+            'SELECT fid, hash, slabs FROM slabs WHERE position >= ? ORDER BY position LIMIT ?', (position, count))]
+
+    def commit(self, fids, hashes, slabs):
+        """
+        Commits the slabs of the next objects with the progress, at once.
+        """
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO slabs VALUES (?, ?, ?, ?)', 
+                                        [(self.objects + index, fid, hash, values.tobytes()) for index, (fid, hash, values) in enumerate(zip(fids, hashes, slabs))])
+            self.objects += len(fids)
+            self.slabs += sum(len(values) for values in slabs)
+            self.last_fid = fids[-1] if fids else self.last_fid
+            self.connection.execute('UPDATE progress SET objects = ?, last_fid = ?, slabs = ?', (self.objects, self.last_fid, self.slabs))
+
+    def finish(self):
+        """
+        Records that the run is finished: the next run starts again, the layer
+        may have changed since.
+        """
+        with self.connection:
+            self.connection.execute('UPDATE progress SET finished = 1')
+
+    def close(self):
+        self.connection.close()
+
+
+def checkpointed_grids(objects, checkpoint, compute, fid_of, chunk_bytes=None):
+    """
+    Yields the (keys, grid) pairs of (key, wkb, bbox) objects in their order,
+    like serial_grids or parallel_grids. The objects committed to checkpoint
+    by the previous runs are read from it, by chunks of at most CHUNK_SIZE
+    objects, after checking their feature id and geometry; the next objects
+    are given to compute, which yields their (keys, grid) pairs, and every
+    chunk is committed. fid_of returns the feature id of a key.
+    """
+    objects = iter(objects)
+    position = 0
+    while position < checkpoint.resumed_objects:
+        keys = []
+        committed = checkpoint.read(position, CHUNK_SIZE)
+        for fid, hash, slabs in committed:
+            key, wkb, bbox = next(objects, (None, None, None))
+            if key is None or fid_of(key) != fid or geometry_hash(wkb, bbox) != hash:
+                raise CheckpointError('object {} does not match the checkpoint'.format(position + len(keys)))
+            keys.append(key)
+        position += len(committed)
+        yield keys, slabs_grid([slabs for fid, hash, slabs in committed])
+
+    # the objects hashed before the computation, the worker processes do not send back their WKB
+    hashes = deque()
+
+    def computed():
+        for key, wkb, bbox in objects:
+            hashes.append(geometry_hash(wkb, bbox))
+            yield key, wkb, bbox
+
+    results = compute(computed())
+    try:
+        for keys, grid in results:
+            checkpoint.commit([fid_of(key) for key in keys], [hashes.popleft() for key in keys], object_slabs(grid, len(keys)))
+            yield keys, grid
+    finally:
+        results.close()
+
+
+def code_version(*paths):
+    """
+    Returns the hash of the code of this module and of the given files: the
+    results of another version of the code are not reused.
+    """
+    code_hash = hashlib.sha1()
+    for path in (__file__,) + paths:
+        with open(path, 'rb') as code:
+            code_hash.update(code.read())
+    return code_hash.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed folder of complete outputs, shared by the runs of any
+    project or user: an output is stored under the hash of its key (the
+    fingerprint of the source layer, the parameters and the code version) and
+    read back by any run of the same key. Beyond max_bytes, the least recently
+    used outputs are deleted. The outputs are written to a partial file first,
+    then renamed, so that a run never reads an incomplete output.
+    """
+
+    def __init__(self, directory, max_bytes):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        """
+        Returns the path of the output of a key, any JSON serializable value.
+        """
+        return os.path.join(self.directory, hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest() + RESULT_SUFFIX)
+
+    def lookup(self, key):
+        """
+        Returns the path of the stored output of the key, None if there is none.
+        """
+        path = self.path(key)
+        try:
+            # the modification time is the last use, for the eviction, finer than the file system clock
+            now = time()
+            os.utime(path, (now, now))
+        except OSError:
+            return None
+        return path
+
+    def partial(self):
+        """
+        Returns a new path where an output is written before it is stored.
+        """
+        return os.path.join(self.directory, '{}{}-{}{}'.format(RESULT_PARTIAL_PREFIX, os.getpid(), threading.get_ident(), RESULT_SUFFIX))
+
+    def store(self, key, partial_path):
+        """
+        Stores the output written in partial_path as the output of the key, then
+        evicts the least recently used outputs. A partial file deleted by the
+        eviction of another run, as left by a killed run, is not stored.
+        """
+        try:
+            os.replace(partial_path, self.path(key))
+        except FileNotFoundError:
+            return
+        self.evict()
+
+    def discard(self, partial_path):
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    def evict(self):
+        """
+        Deletes the least recently used outputs until the folder holds at most
+        max_bytes of them, and the partial files of the runs killed or crashed:
+        not written for RESULT_PARTIAL_AGE seconds. Another run may delete them
+        at the same time.
+        """
+        outputs = []
+        now = time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(RESULT_SUFFIX):
+                continue
+            try:
+                if not entry.name.startswith(RESULT_PARTIAL_PREFIX):
+                    outputs.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+                elif now - entry.stat().st_mtime > RESULT_PARTIAL_AGE:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        size = sum(output[1] for output in outputs)
+        for mtime, output_size, output_path in sorted(outputs):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+            size -= output_size
+
+
+class SharedSlabs:
+    """
+    Hash index of the slabs of the global grid anchored at anchor, by their
+    row and col in the global grid (starting at 1 at the anchor): every
+    distinct slab is kept once with the list of the objects it covers, in the
+    order of its first object.
+    """
+
+    def __init__(self, anchor, slab_dx, slab_dy):
+        self.anchor = anchor
+        self.slab_dx = slab_dx
+        self.slab_dy = slab_dy
+        self.index = {}
+        # [row, col, min_x, min_y, max_x, max_y, objects] lists
+        self.slabs = []
+
+    def add(self, objects, grid):
+        """
+        Adds the slabs of a grid, objects giving the object of every slab.
+        """
+        rows = (np.rint((grid['min_x'] - self.anchor[0]) / self.slab_dx).astype(np.int64) + 1).tolist()
+        cols = (np.rint((grid['min_y'] - self.anchor[1]) / self.slab_dy).astype(np.int64) + 1).tolist()
+        for id_object, row, col, min_x, min_y, max_x, max_y in \
+                zip(objects, rows, cols, *(grid[column].tolist() for column in ('min_x', 'min_y', 'max_x', 'max_y'))):
+            slab = self.index.get((row, col))
+            if slab is None:
+                slab = [row, col, min_x, min_y, max_x, max_y, []]
+                self.index[(row, col)] = slab
+                self.slabs.append(slab)
+            slab[6].append(id_object)
+
+    def __len__(self):
+        return len(self.slabs)
+
+    def __iter__(self):
+        return iter(self.slabs)
+
+
+def prefetched(objects, size=PIPELINE_OBJECTS, canceled=None):
+    """
+    Yields the items of objects read ahead in a thread, at most size items
+    waiting in a queue. The thread stops reading when the consumer stops, or
+    when canceled() is true; an exception of the reading is raised here.
+    """
+    items = queue.Queue(size)
+    stop = threading.Event()
+
+    def offer(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=PIPELINE_POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read():
+        try:
+            for item in objects:
+                if not offer(('item', item)) or (canceled and canceled()):
+                    break
+        except BaseException as error:
+            offer(('error', error))
+        offer(('end', None))
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, item = items.get()
+            if kind == 'end':
+                break
+            if kind == 'error':
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class PipelineWriter:
+    """
+    Writes batches in a thread with write, at most size batches waiting in a
+    queue: put blocks while the queue is full. An exception of write stops the
+    writing and is raised by the next put, or by close, which waits for the
+    batches put before.
+    """
+
+    def __init__(self, write, size=PIPELINE_BATCHES):
+        self.write = write
+        self.batches = queue.Queue(size)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            if self.error is None:
+                try:
+                    self.write(batch)
+                except BaseException as error:
+                    self.error = error
+
+    def put(self, batch):
+        if self.error is not None:
+            raise self.error
+        self.batches.put(batch)
+
+    def close(self):
+        self.batches.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory, in MB, of this process and of its largest
+    child process, or None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    scale = 1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+
+# That's all folks!
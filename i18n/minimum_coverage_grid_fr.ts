@@ -0,0 +1,407 @@
+<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE TS>
+<TS version="2.1" language="fr_FR">
+<context>
+    <name>mCG</name>
+    <message>
+        <source>Minimum coverage grid</source>
+        <translation>Grille de couverture minimale</translation>
+    </message>
+    <message>
+        <source>grid</source>
+        <translation>grille</translation>
+    </message>
+    <message>
+        <source>input table</source>
+        <translation>table d'entrée</translation>
+    </message>
+    <message>
+        <source>sort column</source>
+        <translation>colonne de tri</translation>
+    </message>
+    <message>
+        <source>key column of a slim output: only this column of the input table is written, the others are joined</source>
+        <translation>colonne clé d'une sortie allégée : seule cette colonne de la table d'entrée est écrite, les autres sont jointes</translation>
+    </message>
+    <message>
+        <source>slab's width</source>
+        <translation>largeur de la dalle</translation>
+    </message>
+    <message>
+        <source>slab's height</source>
+        <translation>hauteur de la dalle</translation>
+    </message>
+    <message>
+        <source>other slab sizes to try for every object, width x height separated by semicolons (6000x7000; 10000x8500...)</source>
+        <translation>autres tailles de dalle à essayer pour chaque objet, largeur x hauteur séparées par des points-virgules (6000x7000; 10000x8500...)</translation>
+    </message>
+    <message>
+        <source>buffer percentage around objects</source>
+        <translation>pourcentage de tampon autour des objets</translation>
+    </message>
+    <message>
+        <source>add columns containing coordinates of slabs</source>
+        <translation>ajouter des colonnes contenant les coordonnées des dalles</translation>
+    </message>
+    <message>
+        <source>add columns containing coordinates of bounding boxes</source>
+        <translation>ajouter des colonnes contenant les coordonnées de l'emprise des objets</translation>
+    </message>
+    <message>
+        <source>do not keep "white" slabs</source>
+        <translation>ne pas conserver les dalles "blanches"</translation>
+    </message>
+    <message>
+        <source>number of offset attempts to be applied to try to obtain a minimum of slabs (slow!)</source>
+        <translation>nombre de tentatives de décalage à appliquer pour tenter d'obtenir un minimum de dalles (peut être lent !)</translation>
+    </message>
+    <message>
+        <source>offset search method</source>
+        <translation>méthode de recherche du décalage</translation>
+    </message>
+    <message>
+        <source>slab grid</source>
+        <translation>grille des dalles</translation>
+    </message>
+    <message>
+        <source>largest extent of a cluster of objects, in slabs</source>
+        <translation>plus grande emprise d'un groupe d'objets, en dalles</translation>
+    </message>
+    <message>
+        <source>buffer computation</source>
+        <translation>calcul du tampon</translation>
+    </message>
+    <message>
+        <source>buffer segments per quarter circle</source>
+        <translation>segments du tampon par quart de cercle</translation>
+    </message>
+    <message>
+        <source>number of worker processes (0: no parallel processing)</source>
+        <translation>nombre de processus de calcul (0 : pas de traitement parallèle)</translation>
+    </message>
+    <message>
+        <source>number of slabs written to the output at once</source>
+        <translation>nombre de dalles écrites ensemble dans la couche de sortie</translation>
+    </message>
+    <message>
+        <source>streaming mode: bounding boxes first, then geometries by chunks only when needed (bounded memory, two passes)</source>
+        <translation>mode flux : emprises d'abord, puis géométries par paquets seulement si nécessaire (mémoire bornée, deux passes)</translation>
+    </message>
+    <message>
+        <source>pipelined mode: features read and slabs written in threads, during the computation</source>
+        <translation>mode pipeline : objets lus et dalles écrites dans des fils d'exécution, pendant le calcul</translation>
+    </message>
+    <message>
+        <source>incremental mode: cache file of the slabs, only changed objects are computed again</source>
+        <translation>mode incrémental : fichier cache des dalles, seuls les objets modifiés sont recalculés</translation>
+    </message>
+    <message>
+        <source>checkpoint file: the slabs are committed by chunks, a canceled or crashed run resumes after the last committed chunk</source>
+        <translation>fichier de reprise : les dalles sont enregistrées par paquets, un calcul annulé ou interrompu reprend après le dernier paquet enregistré</translation>
+    </message>
+    <message>
+        <source>result cache folder: a run with the same layer and parameters reads the stored slabs, from any project</source>
+        <translation>dossier du cache des résultats : un calcul avec la même couche et les mêmes paramètres relit les dalles enregistrées, depuis tout projet</translation>
+    </message>
+    <message>
+        <source>largest size of the result cache folder, in MB (the least recently used results are deleted)</source>
+        <translation>taille maximale du dossier du cache des résultats, en Mo (les résultats utilisés le moins récemment sont supprimés)</translation>
+    </message>
+    <message>
+        <source>profile the computation: time of every phase, GEOS calls and slowest features</source>
+        <translation>profiler le calcul : temps de chaque phase, appels GEOS et objets les plus lents</translation>
+    </message>
+    <message>
+        <source>profile report (JSON)</source>
+        <translation>rapport de profil (JSON)</translation>
+    </message>
+    <message>
+        <source>minimum coverage grid</source>
+        <translation>grille de couverture minimale</translation>
+    </message>
+    <message>
+        <source>exact</source>
+        <translation>exacte</translation>
+    </message>
+    <message>
+        <source>occupancy raster (faster, one raster cell tolerance)</source>
+        <translation>raster d'occupation (plus rapide, tolérance d'une cellule du raster)</translation>
+    </message>
+    <message>
+        <source>vertex breakpoints (ignores the number of attempts)</source>
+        <translation>points de rupture des sommets (ignore le nombre de tentatives)</translation>
+    </message>
+    <message>
+        <source>grid centered on every object</source>
+        <translation>grille centrée sur chaque objet</translation>
+    </message>
+    <message>
+        <source>global grid anchored at the layer extent</source>
+        <translation>grille globale ancrée sur l'emprise de la couche</translation>
+    </message>
+    <message>
+        <source>global grid, every slab written once with the list of its objects</source>
+        <translation>grille globale, chaque dalle écrite une seule fois avec la liste de ses objets</translation>
+    </message>
+    <message>
+        <source>clusters of nearby objects sharing a grid, every slab written once with the list of its objects</source>
+        <translation>groupes d'objets voisins partageant une grille, chaque dalle écrite une seule fois avec la liste de ses objets</translation>
+    </message>
+    <message>
+        <source>exact buffer</source>
+        <translation>tampon exact</translation>
+    </message>
+    <message>
+        <source>buffer of the simplified object</source>
+        <translation>tampon de l'objet simplifié</translation>
+    </message>
+    <message>
+        <source>distance test, no buffer (fastest)</source>
+        <translation>test de distance, sans tampon (le plus rapide)</translation>
+    </message>
+    <message>
+        <source>SQLite files (*.sqlite)</source>
+        <translation>Fichiers SQLite (*.sqlite)</translation>
+    </message>
+    <message>
+        <source>JSON files (*.json)</source>
+        <translation>Fichiers JSON (*.json)</translation>
+    </message>
+    <message>
+        <source>
+
+The "{}" column already exists, change the script code or column name in input table</source>
+        <translation>
+
+La colonne "{}" existe déjà, modifiez le code du script ou le nom de la colonne dans la table d'entrée</translation>
+    </message>
+    <message>
+        <source>
+
+The slab size "{}" is not valid, write it width x height, both at least {}</source>
+        <translation>
+
+La taille de dalle "{}" n'est pas valide, écrivez-la largeur x hauteur, toutes deux d'au moins {}</translation>
+    </message>
+    <message>
+        <source>
+
+The layer does not match the checkpoint file "{}" anymore, delete it to start again</source>
+        <translation>
+
+La couche ne correspond plus au fichier de reprise "{}", supprimez-le pour recommencer</translation>
+    </message>
+    <message>
+        <source>prepared geometry engine: {} intersection tests in {:.3f} s, about {:.1f}x faster than unprepared tests on a sample object</source>
+        <translation>moteur de géométrie préparée : {} tests d'intersection en {:.3f} s, environ {:.1f} fois plus rapides que sans préparation sur un objet témoin</translation>
+    </message>
+    <message>
+        <source>peak memory: {:.0f} MB</source>
+        <translation>pic de mémoire : {:.0f} Mo</translation>
+    </message>
+    <message>
+        <source>peak memory of the largest worker process: {:.0f} MB</source>
+        <translation>pic de mémoire du plus gros processus de calcul : {:.0f} Mo</translation>
+    </message>
+    <message>
+        <source>incremental mode: {} objects read from the cache, {} objects computed</source>
+        <translation>mode incrémental : {} objets lus dans le cache, {} objets calculés</translation>
+    </message>
+    <message>
+        <source>checkpoint: resumed after {} objects and {} slabs (last feature {})</source>
+        <translation>reprise : {} objets et {} dalles déjà calculés (dernier objet {})</translation>
+    </message>
+    <message>
+        <source>checkpoint: {} objects and {} slabs committed</source>
+        <translation>reprise : {} objets et {} dalles enregistrés</translation>
+    </message>
+    <message>
+        <source>result cache: the slabs of the same layer and parameters are read from {}</source>
+        <translation>cache des résultats : les dalles de la même couche avec les mêmes paramètres sont lues dans {}</translation>
+    </message>
+    <message>
+        <source>result cache: the slabs are stored in {}</source>
+        <translation>cache des résultats : les dalles sont enregistrées dans {}</translation>
+    </message>
+    <message>
+        <source>result cache: not used, the layer is not read from a file, has unsaved edits or only some of its features are read</source>
+        <translation>cache des résultats : non utilisé, la couche n'est pas lue dans un fichier, a des modifications non enregistrées ou seule une partie de ses objets est lue</translation>
+    </message>
+    <message>
+        <source>slim output: the columns of "{}" are joined on the "{}" column</source>
+        <translation>sortie allégée : les colonnes de "{}" sont jointes sur la colonne "{}"</translation>
+    </message>
+    <message>
+        <source>profile: {:&lt;20} {:10.3f} s</source>
+        <translation>profil : {:&lt;20} {:10.3f} s</translation>
+    </message>
+    <message>
+        <source>profile: the computation phases are summed over the {} worker processes</source>
+        <translation>profil : les phases de calcul sont cumulées sur les {} processus de calcul</translation>
+    </message>
+    <message>
+        <source>profile: {} GEOS predicate calls, {} slabs considered, {} slabs emitted</source>
+        <translation>profil : {} appels de prédicats GEOS, {} dalles examinées, {} dalles produites</translation>
+    </message>
+    <message>
+        <source>profile: feature {} took {:.3f} s (buffer and offset search)</source>
+        <translation>profil : l'objet {} a pris {:.3f} s (tampon et recherche du décalage)</translation>
+    </message>
+    <message>
+        <source>
+***************************************************************************
+    minimum_coverage_grid.py
+    ------------------------
+    Date                 : October 2018
+    Copyright            : (C) 2018 by oSvy
+    Email                : 
+ minimum coverage grid
+======================
+
+    /***************************************************************************
+     *                                                                         *
+     *   This program is free software; you can redistribute it and/or modify  *
+     *   it under the terms of the GNU General Public License as published by  *
+     *   the Free Software Foundation; either version 2 of the License, or     *
+     *   (at your option) any later version.                                   *
+     *                                                                         *
+     ***************************************************************************/
+
+This script aims to facilitate QGIS atlas's use
+-----------------------------------------------
+
+Sometimes we want to print on a defined scale objects that are larger than the paper medium.
+
+They must therefore be spread over several slabs.
+
+For each object, the script calculates the bounding box, then computes the minimal slabs' number, and finaly centers the slabs around the object.
+
+It creates a layer of rectangular polygons that cover each objects of a given layer as a parameter.
+
+Rectangular polygons (slabs) have a fixed size given as parameter.
+
+An extent percentage around each object's bounding box may be applied before calculating the slabs.
+
+The produced layer keeps original layer's columns and adds additional columns. If there is a column name conflict, if the script tries to create a column that already exists, it stops.
+
+The additional attributes are:
+- '_id_object' an integer for each original object
+- '_id_slab' a single integer per slab
+- '_id_object_slab' a single integer per slab for each '_id_object'
+- '_row_object_slab' the slab's row for each '_id_object'
+- '_col_object_slab' the slab's column for each '_id_object'
+
+If a sort column is asked, this attribute is added:
+- '_ord_object_slab' a sort value composed of the selected field, an anchor (#) and the single integer per slab for each '_id_object'
+
+If slab's coordinates are asked, these attributes are added:
+- '_min_x_slab' a double for the minimum x value
+- '_max_x_slab' a double for the maximum x value
+- '_min_y_slab' a double for the minimum y value
+- '_max_y_slab' a double for the maximum y value
+
+If original object's bounding box's coordinates are asked, these attributes are added:
+- '_min_x_object' a double for the minimum x value
+- '_max_x_object' a double for the maximum x value
+- '_min_y_object' a double for the minimum y value
+- '_max_y_object' a double for the maximum y value
+
+Other options can be chosen:
+- You can only keep boxes that intersect the object.
+- The set of slabs can be adjusted to the bounding box, but more often it is larger. The algorithm may try to shift the slab around the center to find a smaller number of intersecting slabs.
+- The offset search may be exact, or use an occupancy raster of the object: much faster with many offsets or slabs, but a slab may then be counted as intersecting when the object passes within one raster cell of it (at most one offset step, and 1/20 of the slab, unless the raster would exceed 8 million cells: its cells are then coarser). Kept slabs are still tested exactly.
+- The offset search may also ignore the number of offset attempts and try the shifts where a slab edge passes a vertex of the object, then refine them one axis at a time: often fewer slabs than many offset attempts, slower on objects of many vertices.
+- The slabs may also be those of a global grid anchored at the lower left corner of the layer extent, without offset search, so that nearby objects share the same slabs. Every slab may then be written only once, with '_id_slab', '_row_slab' and '_col_slab' its row and column in the global grid, '_count_objects' and '_id_objects' the '_id_object' of the objects it covers separated by commas, and the slab's coordinates if asked: the columns of the input table, the sort column and the bounding box coordinates are not written.
+- Nearby objects may also be grouped, with a spatial index of their bounding boxes, into clusters whose extent fits in a block of a chosen number of slabs per side, and every cluster gets one grid, so that many small nearby objects share their slabs. Every slab is written once, with '_id_cluster', '_id_slab', '_id_cluster_slab', '_row_cluster_slab', '_col_cluster_slab', '_count_objects' and '_id_objects' the '_id_object' of the objects of the cluster separated by commas, and the slab's coordinates if asked. The bounding boxes are read first, then the geometries by chunks of clusters; the buffer percentage applies to the extent of the cluster.
+- Other slab sizes may be given, width x height separated by semicolons, 6000x7000 for the slab's width and height swapped for instance: every object, or cluster, then gets the size giving it the fewest slabs, the first one on a tie, written in '_format_slab' as width x height. The sizes are tried by increasing lower bound of their number of slabs, and a size that cannot give fewer slabs than the best one found is not computed. The global grid only uses the slab's width and height.
+- A key column may be chosen for a slim output: only this column of the input table is written with the additional columns, instead of all of them for every slab, and the other columns are joined from the input layer on the key column when the output is loaded in the project, so the output layer stays small. The key column should be unique, the feature id column of a GeoPackage for instance. The join is only added when the input is a layer of the project.
+- The slabs may be computed by several worker processes; the order of the objects and the numbering of the slabs stay the same.
+- A streaming mode reads the bounding boxes first, then the features by chunks, with their geometries only when needed to remove blank slabs or to shift the grids, so that memory stays bounded on very large geometries. The peak memory is reported.
+- A pipelined mode reads the features in a thread, ahead of the computation, and writes the slabs in another thread, with bounded queues between them, so that the reading of a database and the writing of the output overlap the computation. Canceling stops the reading, the slabs already computed are written.
+- The buffer may be exact, with a chosen number of segments per quarter circle, built on the object simplified by 5% of the buffer distance, or not built at all: the slabs are then tested by their distance to the object, which gives the true round buffer and is much faster on complex objects.
+- An incremental mode keeps the slabs of every object in a SQLite cache file, with the hash of its geometry and the options: when the layer is computed again with the same options, only the new or modified objects are computed, the others are read from the cache, and the numbering of the slabs stays the same.
+- A result cache folder may be chosen, shared by any project or user: the slabs of a run are stored there in a GeoPackage named by the hash of the fingerprint of the layer (its source, the last modification of its files and its number of features), of the parameters and of the script version, and a run with the same layer and parameters copies them to the output without any computation. Beyond the chosen size, the least recently used results are deleted. Only the layers read from files are cached, not their selected features nor their unsaved edits.
+- A checkpoint file may be chosen for long runs: the slabs are committed to this SQLite file by chunks of features, with the progress (objects and slabs done, last feature id) in the same transaction. When a canceled or crashed run is started again with the same file and options, the committed chunks are read back instead of computed, after checking their features and geometries, and the computation resumes after the last one, with the same numbering of the slabs. The checkpoint of other options, or of a finished run, is started again.
+- A profile of the computation can be reported: the time of every phase (feature fetch, bounding boxes, WKB, buffers, offset search, rectangles, intersection tests, attribute copy, output writing), the GEOS predicate calls, the slabs considered and emitted and the slowest features, in the log and optionally in a JSON file.
+
+</source>
+        <translation>
+***************************************************************************
+    minimum_coverage_grid_fr.py
+    ---------------------------
+    Date: octobre 2018
+    Copyright: (C) 2018 par oSvy
+    Email :
+ grille de couverture minimale
+==============================
+
+    /***************************************************************************
+     *                                                                         *
+     * Ce programme est un logiciel libre; vous pouvez le redistribuer et/ou   *
+     * modifier sous les termes de la licence publique générale GNU telle que  *
+     * publiée par la Free Software Foundation; soit la version 2 de la        *
+     * licence, ou (à votre choix) toute version ultérieure.                   *
+     *                                                                         *
+     ***************************************************************************/
+
+Ce script a pour but de faciliter l'utilisation de l'atlas QGIS
+---------------------------------------------------------------
+
+Parfois, nous souhaitons imprimer à une échelle définie des objets plus grands que le support papier.
+
+Ils doivent donc être répartis sur plusieurs dalles.
+
+Pour chaque objet, le script calcule le cadre de sélection, puis calcule le nombre minimal de dalles, enfin centre les dalles autour de l'objet.
+
+Il crée une couche de polygones rectangulaires qui couvrent chaque objet d'une couche donnée en tant que paramètre.
+
+Les polygones rectangulaires (dalles) ont une taille fixe donnée en paramètre.
+
+Un pourcentage d'étendue autour du cadre de sélection de chaque objet peut être appliqué avant le calcul des dalles.
+
+Le calque produit conserve les colonnes du calque d'origine et ajoute des colonnes supplémentaires. S'il existe un conflit de nom de colonne, si le script tente de créer une colonne déjà existante, il s'arrête.
+
+Les attributs supplémentaires sont:
+- '_id_object' un entier pour chaque objet d'origine
+- '_id_slab' un entier unique par dalle
+- '_id_object_slab' un seul entier par dalle pour chaque '_id_object'
+- '_row_object_slab' la rangée de la dalle pour chaque '_id_object'
+- '_col_object_slab' la colonne de la dalle pour chaque '_id_object'
+
+Si une colonne de tri est demandée, cet attribut est ajouté:
+- '_ord_object_slab' une valeur de tri composée du champ sélectionné, d'une ancre (#) et de l'entier unique par dalle pour chaque '_id_object'
+
+Si les coordonnées de la dalle sont demandées, ces attributs sont ajoutés:
+- '_min_x_slab' un double pour la valeur x minimale
+- '_max_x_slab' un double pour la valeur x maximale
+- '_min_y_slab' un double pour la valeur y minimale
+- '_max_y_slab' un double pour la valeur y maximale
+
+Si les coordonnées du cadre de sélection de l'objet d'origine sont demandées, ces attributs sont ajoutés:
+- '_min_x_object' un double pour la valeur x minimale
+- '_max_x_object' un double pour la valeur x maximale
+- '_min_y_object' un double pour la valeur y minimale
+- '_max_y_object' un double pour la valeur y maximale
+
+D'autres options peuvent être choisies:
+- Vous ne pouvez conserver que les boîtes qui coupent l'objet.
+- L'ensemble des dalles peut être ajusté à la boîte englobante, mais le plus souvent, il est plus grand. L'algorithme peut essayer de déplacer la dalle autour du centre pour trouver un plus petit nombre de dalles se croisant.
+- La recherche du décalage peut être exacte, ou utiliser un raster d'occupation de l'objet : beaucoup plus rapide avec de nombreux décalages ou dalles, mais une dalle peut alors être comptée comme coupant l'objet quand celui-ci passe à moins d'une cellule du raster (au plus un pas de décalage, et 1/20 de la dalle, sauf si le raster dépasse 8 millions de cellules : ses cellules sont alors plus grandes). Les dalles conservées restent testées exactement.
+- La recherche du décalage peut aussi ignorer le nombre de tentatives de décalage et essayer les décalages où un bord de dalle passe par un sommet de l'objet, puis les affiner un axe après l'autre : souvent moins de dalles que de nombreuses tentatives, plus lent sur les objets de nombreux sommets.
+- Les dalles peuvent aussi être celles d'une grille globale ancrée sur le coin inférieur gauche de l'emprise de la couche, sans recherche du décalage, afin que les objets voisins partagent les mêmes dalles. Chaque dalle peut alors n'être écrite qu'une fois, avec '_id_slab', '_row_slab' et '_col_slab' sa rangée et sa colonne dans la grille globale, '_count_objects' et '_id_objects' les '_id_object' des objets qu'elle couvre séparés par des virgules, et les coordonnées de la dalle si elles sont demandées : les colonnes de la table d'entrée, la colonne de tri et les coordonnées des emprises ne sont pas écrites.
+- Les objets voisins peuvent aussi être regroupés, avec un index spatial de leurs emprises, en groupes dont l'emprise tient dans un bloc d'un nombre choisi de dalles de côté, et chaque groupe reçoit une seule grille, afin que de nombreux petits objets voisins partagent leurs dalles. Chaque dalle est écrite une fois, avec '_id_cluster', '_id_slab', '_id_cluster_slab', '_row_cluster_slab', '_col_cluster_slab', '_count_objects' et '_id_objects' les '_id_object' des objets du groupe séparés par des virgules, et les coordonnées de la dalle si elles sont demandées. Les emprises sont lues d'abord, puis les géométries par paquets de groupes ; le pourcentage de tampon s'applique à l'emprise du groupe.
+- D'autres tailles de dalle peuvent être données, largeur x hauteur séparées par des points-virgules, 6000x7000 pour la largeur et la hauteur de la dalle inversées par exemple : chaque objet, ou groupe, reçoit alors la taille qui lui donne le moins de dalles, la première en cas d'égalité, écrite dans '_format_slab' sous la forme largeur x hauteur. Les tailles sont essayées par minorant croissant de leur nombre de dalles, et une taille qui ne peut pas donner moins de dalles que la meilleure trouvée n'est pas calculée. La grille globale n'utilise que la largeur et la hauteur de la dalle.
+- Une colonne clé peut être choisie pour une sortie allégée : seule cette colonne de la table d'entrée est écrite avec les colonnes supplémentaires, au lieu de toutes pour chaque dalle, et les autres colonnes sont jointes depuis la couche d'entrée sur la colonne clé quand la sortie est chargée dans le projet, afin que la couche de sortie reste petite. La colonne clé doit être unique, la colonne d'identifiant d'un GeoPackage par exemple. La jointure n'est ajoutée que si l'entrée est une couche du projet.
+- Les dalles peuvent être calculées par plusieurs processus ; l'ordre des objets et la numérotation des dalles restent les mêmes.
+- Un mode flux lit d'abord les emprises, puis les objets par paquets, avec leurs géométries seulement si elles sont nécessaires pour écarter les dalles blanches ou décaler les grilles, afin de borner la mémoire sur de très grandes géométries. Le pic de mémoire est affiché.
+- Un mode pipeline lit les objets dans un fil d'exécution, en avance sur le calcul, et écrit les dalles dans un autre, avec des files bornées entre eux, afin que la lecture d'une base de données et l'écriture de la sortie se fassent pendant le calcul. L'annulation arrête la lecture, les dalles déjà calculées sont écrites.
+- Le tampon peut être exact, avec un nombre choisi de segments par quart de cercle, construit sur l'objet simplifié à 5% de la distance du tampon, ou pas construit du tout : les dalles sont alors testées par leur distance à l'objet, ce qui donne le vrai tampon arrondi et est bien plus rapide sur les objets complexes.
+- Un mode incrémental conserve les dalles de chaque objet dans un fichier cache SQLite, avec l'empreinte de sa géométrie et les options : quand la couche est recalculée avec les mêmes options, seuls les objets nouveaux ou modifiés sont calculés, les autres sont lus dans le cache, et la numérotation des dalles reste la même.
+- Un dossier de cache des résultats peut être choisi, partagé par tous les projets et utilisateurs : les dalles d'un calcul y sont enregistrées dans un GeoPackage nommé par le condensé de l'empreinte de la couche (sa source, la dernière modification de ses fichiers et son nombre d'objets), des paramètres et de la version du script, et un calcul avec la même couche et les mêmes paramètres les copie dans la sortie sans aucun calcul. Au-delà de la taille choisie, les résultats utilisés le moins récemment sont supprimés. Seules les couches lues dans des fichiers sont mises en cache, ni leurs objets sélectionnés ni leurs modifications non enregistrées.
+- Un fichier de reprise peut être choisi pour les longs calculs : les dalles sont enregistrées dans ce fichier SQLite par paquets d'objets, avec l'avancement (objets et dalles calculés, identifiant du dernier objet) dans la même transaction. Quand un calcul annulé ou interrompu est relancé avec le même fichier et les mêmes options, les paquets enregistrés sont relus au lieu d'être calculés, après vérification de leurs objets et géométries, et le calcul reprend après le dernier, avec la même numérotation des dalles. La reprise d'autres options, ou d'un calcul terminé, est recommencée.
+- Un profil du calcul peut être affiché : le temps de chaque phase (lecture des objets, emprises, WKB, tampons, recherche du décalage, rectangles, tests d'intersection, copie des attributs, écriture), les appels de prédicats GEOS, les dalles examinées et produites et les objets les plus lents, dans le journal et si besoin dans un fichier JSON.
+
+</translation>
+    </message>
+</context>
+</TS>
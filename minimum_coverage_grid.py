@@ -22,20 +22,310 @@ from qgis.core import ( QgsField,
                         QgsFeatureRequest, 
                         QgsProcessing, 
                         QgsProcessingAlgorithm, 
+                        QgsApplication, 
                         QgsProcessingParameterFeatureSource, 
                         QgsProcessingParameterFeatureSink, 
                         QgsProcessingException, 
                         QgsProcessingParameterField, 
                         QgsProcessingParameterNumber, 
                         QgsProcessingParameterBoolean, 
+                        QgsProcessingParameterEnum, 
+                        QgsProcessingParameterFile, 
+                        QgsProcessingParameterFileDestination, 
+                        QgsProcessingParameterString, 
+                        QgsProcessingLayerPostProcessorInterface, 
+                        QgsVectorLayerJoinInfo, 
+                        QgsProcessingFeatureSourceDefinition, 
+                        QgsProviderRegistry, 
+                        QgsVectorFileWriter, 
+                        QgsVectorLayer, 
                         QgsFields,
                         QgsGeometry,
                         QgsRectangle,
                         QgsWkbTypes)
-from math import ceil
+from time import perf_counter
+import glob
+import heapq
+import json
+import os
+import sys
+import xml.etree.ElementTree as ElementTree
 
-# useful fonction
-center_of = lambda a, b : a + (b - a) / 2.0
+# the computation is shared with the other scripts of the folder and with the worker processes
+if os.path.dirname(__file__) not in sys.path:
+    sys.path.append(os.path.dirname(__file__))
+from coverage_grid import ( BUFFER_EXACT,
+                            BUFFER_SEGMENTS,
+                            CHUNK_SIZE,
+                            Checkpoint,
+                            CheckpointError,
+                            GRID_CENTERED,
+                            GRID_CLUSTERED,
+                            GRID_GLOBAL,
+                            GRID_SHARED,
+                            GridCache,
+                            PipelineWriter,
+                            ResultCache,
+                            SOLVER_BREAKPOINTS,
+                            SOLVER_EXACT,
+                            STREAM_CHUNK_BYTES,
+                            SharedSlabs,
+                            add_time,
+                            cached_grids,
+                            checkpointed_grids,
+                            cluster_objects,
+                            code_version,
+                            merge_statistics,
+                            new_statistics,
+                            parallel_grids,
+                            peak_memory,
+                            prefetched,
+                            process_pool,
+                            serial_grids,
+                            union_wkb)
+
+# useful fonctions
+def geometry_bbox(geometry):
+    """
+    Returns the (min_x, min_y, max_x, max_y) bounding box of a geometry.
+    """
+    bounding_geom = geometry.boundingBox()
+    return (bounding_geom.xMinimum(), bounding_geom.yMinimum(), bounding_geom.xMaximum(), bounding_geom.yMaximum())
+
+
+def geometry_wkb(geometry):
+    """
+    Returns the WKB of a geometry, curved geometries being segmentized, or None
+    for a null geometry.
+    """
+    if geometry.isNull():
+        return None
+    if QgsWkbTypes.isCurvedType(geometry.wkbType()):
+        geometry = QgsGeometry(geometry.constGet().segmentize())
+    return bytes(geometry.asWkb())
+
+
+def source_objects(source, ord_field, with_geometry, statistics, key_field=None):
+    """
+    Yields the ((id_object, attributes, sort value, bbox, feature id), wkb, bbox)
+    objects of the features of source, the WKB being None unless with_geometry,
+    and the attributes only the value of the key column with key_field. The
+    features are requested when the first object is read, in the thread reading
+    them. The fetch, bbox and wkb times are added to statistics.
+    """
+    request = QgsFeatureRequest()
+    if key_field:
+        request.setSubsetOfAttributes(key_field + ord_field, source.fields())
+    start_time = perf_counter()
+    for current, feature in enumerate(source.getFeatures(request)):
+        add_time(statistics, 'fetch', start_time)
+        start_time = perf_counter()
+        geometry = feature.geometry()
+        bbox = geometry_bbox(geometry)
+        add_time(statistics, 'bbox', start_time)
+        start_time = perf_counter()
+        wkb = geometry_wkb(geometry) if with_geometry else None
+        add_time(statistics, 'wkb', start_time)
+        attributes = [feature[key_field[0]]] if key_field else feature.attributes()
+        yield (current, attributes, feature[ord_field[0]] if ord_field else None, bbox, feature.id()), wkb, bbox
+        start_time = perf_counter()
+
+
+def streamed_objects(source, ord_field, with_geometry, statistics, key_field=None):
+    """
+    Yields the same objects as source_objects in two passes over the source:
+    the bounding boxes of all the features first, without attributes, then the
+    features by chunks of at most CHUNK_SIZE features and STREAM_CHUNK_BYTES of
+    WKB, without geometry unless with_geometry, and with only the key and sort
+    columns with key_field. Only the geometries of one chunk are in memory at
+    once. The fetch, bbox and wkb times are added to statistics.
+    """
+    fids = []
+    bboxes = []
+    sizes = []
+    start_time = perf_counter()
+    for feature in source.getFeatures(QgsFeatureRequest().setNoAttributes()):
+        add_time(statistics, 'fetch', start_time)
+        start_time = perf_counter()
+        geometry = feature.geometry()
+        fids.append(feature.id())
+        bboxes.append(geometry_bbox(geometry))
+        sizes.append(geometry.constGet().wkbSize() if with_geometry and not geometry.isNull() else 0)
+        add_time(statistics, 'bbox', start_time)
+        start_time = perf_counter()
+
+    first = 0
+    while first < len(fids):
+        # the next chunk
+        last = first
+        chunk_bytes = 0
+        while last < len(fids) and last - first < CHUNK_SIZE and (last == first or chunk_bytes + sizes[last] <= STREAM_CHUNK_BYTES):
+            chunk_bytes += sizes[last]
+            last += 1
+        request = QgsFeatureRequest().setFilterFids(fids[first:last])
+        if not with_geometry:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+        if key_field:
+            request.setSubsetOfAttributes(key_field + ord_field, source.fields())
+        start_time = perf_counter()
+        features = {feature.id(): feature for feature in source.getFeatures(request)}
+        add_time(statistics, 'fetch', start_time)
+        for current in range(first, last):
+            feature = features.pop(fids[current])
+            start_time = perf_counter()
+            wkb = geometry_wkb(feature.geometry()) if with_geometry else None
+            add_time(statistics, 'wkb', start_time)
+            attributes = [feature[key_field[0]]] if key_field else feature.attributes()
+            yield (current, attributes, feature[ord_field[0]] if ord_field else None, bboxes[current], fids[current]), wkb, bboxes[current]
+        first = last
+
+
+def source_fingerprint(layer, source, filtered):
+    """
+    Returns the [provider, URI, last modification time of its files, number of
+    features] fingerprint of the layer read by source, None when the layer is
+    not known by it: not read from a file (database, memory), with unsaved
+    edits, or filtered (selected features...).
+    """
+    if layer is None or filtered or layer.isModified():
+        return None
+    uri = layer.dataProvider().dataSourceUri()
+    path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), uri).get('path')
+    if not path or not os.path.isfile(path):
+        return None
+    # a shapefile, or a GeoPackage and its journal, are several files
+    modified = max(os.path.getmtime(name) for name in glob.glob(glob.escape(os.path.splitext(path)[0]) + '.*'))
+    return [layer.providerType(), uri, modified, source.featureCount()]
+
+
+def stored_features(path, fields):
+    """
+    Yields, in their order, the features of an output stored in the result
+    cache, with the given fields.
+    """
+    stored = QgsVectorLayer(path, 'stored', 'ogr')
+    indexes = [stored.fields().indexOf(field.name()) for field in fields]
+    for stored_feature in stored.getFeatures():
+        attributes = stored_feature.attributes()
+        feature = QgsFeature()
+        feature.setAttributes([attributes[index] for index in indexes])
+        feature.setGeometry(stored_feature.geometry())
+        yield feature
+
+
+def stored_writer(path, fields, crs, context):
+    """
+    Returns the writer of an output in a GeoPackage of the result cache, None
+    if it cannot be created. Its feature id is a column of its own: the input
+    columns may hold a 'fid' column, repeated for every slab.
+    """
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = 'GPKG'
+    options.layerOptions = ['FID={}'.format(STORED_FID)]
+    writer = QgsVectorFileWriter.create(path, fields, QgsWkbTypes.Polygon, crs, context.transformContext(), options)
+    return writer if writer.hasError() == QgsVectorFileWriter.NoError else None
+
+
+def translations(locale):
+    """
+    Returns the {source: translation} table of the Qt translation source of
+    the locale ('fr', 'fr_FR'...), empty without one. It is read once, at the
+    first string translated, not when the script is loaded.
+    """
+    language = locale.split('_')[0]
+    if language not in TRANSLATIONS:
+        TRANSLATIONS[language] = {}
+        if os.path.isfile(TRANSLATION_FILE.format(language)):
+            for message in ElementTree.parse(TRANSLATION_FILE.format(language)).iter('message'):
+                if message.findtext('translation'):
+                    TRANSLATIONS[language][message.findtext('source')] = message.findtext('translation')
+    return TRANSLATIONS[language]
+
+
+def clustered_objects(source, with_geometry, width, height, statistics):
+    """
+    Yields the ((number of features read minus one, id_object of the features,
+    id_cluster, bbox, feature id of the first feature), wkb, bbox) objects of
+    the clusters of nearby features of cluster_objects, whose extent fits in
+    width × height, in the order of their first feature. The bounding boxes of
+    all the features are read first, then their geometries by chunks of
+    clusters of about CHUNK_SIZE features, only if with_geometry: the WKB is the
+    union of the geometries of the cluster. The fetch, bbox, clustering and wkb
+    times are added to statistics.
+    """
+    fids = []
+    bboxes = []
+    start_time = perf_counter()
+    for feature in source.getFeatures(QgsFeatureRequest().setNoAttributes()):
+        add_time(statistics, 'fetch', start_time)
+        start_time = perf_counter()
+        fids.append(feature.id())
+        bboxes.append(geometry_bbox(feature.geometry()))
+        add_time(statistics, 'bbox', start_time)
+        start_time = perf_counter()
+    start_time = perf_counter()
+    clusters, extents = cluster_objects(bboxes, width, height)
+    add_time(statistics, 'clustering', start_time)
+
+    first = 0
+    read = 0
+    while first < len(clusters):
+        # the next clusters, at least one
+        last = first
+        count = 0
+        while last < len(clusters) and (last == first or count + len(clusters[last]) <= CHUNK_SIZE):
+            count += len(clusters[last])
+            last += 1
+        geometries = {}
+        if with_geometry:
+            request = QgsFeatureRequest().setFilterFids([fids[member] for cluster in clusters[first:last] for member in cluster.tolist()]).setNoAttributes()
+            start_time = perf_counter()
+            features = list(source.getFeatures(request))
+            add_time(statistics, 'fetch', start_time)
+            start_time = perf_counter()
+            geometries = {feature.id(): geometry_wkb(feature.geometry()) for feature in features}
+            add_time(statistics, 'wkb', start_time)
+        for id_cluster in range(first, last):
+            members = clusters[id_cluster].tolist()
+            read += len(members)
+            bbox = tuple(extents[id_cluster].tolist())
+            start_time = perf_counter()
+            wkb = union_wkb([geometries[fids[member]] for member in members]) if with_geometry else None
+            add_time(statistics, 'wkb', start_time)
+            yield (read - 1, members, id_cluster + 1, bbox, fids[members[0]]), wkb, bbox
+        first = last
+
+
+class SourceJoin(QgsProcessingLayerPostProcessorInterface):
+    """
+    Joins the columns of the input layer to the slim output layer on the key
+    column, once the output is loaded in the project.
+    """
+
+    # the post processor must outlive processAlgorithm
+    instance = None
+
+    def __init__(self, source_layer_id, key):
+        super().__init__()
+        self.source_layer_id = source_layer_id
+        self.key = key
+
+    def postProcessLayer(self, layer, context, feedback):
+        source_layer = context.project().mapLayer(self.source_layer_id) if context.project() else None
+        if source_layer is None:
+            return
+        join = QgsVectorLayerJoinInfo()
+        join.setJoinLayer(source_layer)
+        join.setJoinFieldName(self.key)
+        join.setTargetFieldName(self.key)
+        join.setUsingMemoryCache(True)
+        join.setPrefix('')
+        layer.addJoin(join)
+
+    @staticmethod
+    def create(source_layer_id, key):
+        SourceJoin.instance = SourceJoin(source_layer_id, key)
+        return SourceJoin.instance
 
 
 __author__ = 'oSvy'
@@ -102,9 +392,23 @@ If original object's bounding box's coordinates are asked, these attributes are
 - '_min_y_object' a double for the minimum y value
 - '_max_y_object' a double for the maximum y value
 
-Two other options can be chosen:
+Other options can be chosen:
 - You can only keep boxes that intersect the object.
 - The set of slabs can be adjusted to the bounding box, but more often it is larger. The algorithm may try to shift the slab around the center to find a smaller number of intersecting slabs.
+- The offset search may be exact, or use an occupancy raster of the object: much faster with many offsets or slabs, but a slab may then be counted as intersecting when the object passes within one raster cell of it (at most one offset step, and 1/20 of the slab, unless the raster would exceed 8 million cells: its cells are then coarser). Kept slabs are still tested exactly.
+- The offset search may also ignore the number of offset attempts and try the shifts where a slab edge passes a vertex of the object, then refine them one axis at a time: often fewer slabs than many offset attempts, slower on objects of many vertices.
+- The slabs may also be those of a global grid anchored at the lower left corner of the layer extent, without offset search, so that nearby objects share the same slabs. Every slab may then be written only once, with '_id_slab', '_row_slab' and '_col_slab' its row and column in the global grid, '_count_objects' and '_id_objects' the '_id_object' of the objects it covers separated by commas, and the slab's coordinates if asked: the columns of the input table, the sort column and the bounding box coordinates are not written.
+- Nearby objects may also be grouped, with a spatial index of their bounding boxes, into clusters whose extent fits in a block of a chosen number of slabs per side, and every cluster gets one grid, so that many small nearby objects share their slabs. Every slab is written once, with '_id_cluster', '_id_slab', '_id_cluster_slab', '_row_cluster_slab', '_col_cluster_slab', '_count_objects' and '_id_objects' the '_id_object' of the objects of the cluster separated by commas, and the slab's coordinates if asked. The bounding boxes are read first, then the geometries by chunks of clusters; the buffer percentage applies to the extent of the cluster.
+- Other slab sizes may be given, width x height separated by semicolons, 6000x7000 for the slab's width and height swapped for instance: every object, or cluster, then gets the size giving it the fewest slabs, the first one on a tie, written in '_format_slab' as width x height. The sizes are tried by increasing lower bound of their number of slabs, and a size that cannot give fewer slabs than the best one found is not computed. The global grid only uses the slab's width and height.
+- A key column may be chosen for a slim output: only this column of the input table is written with the additional columns, instead of all of them for every slab, and the other columns are joined from the input layer on the key column when the output is loaded in the project, so the output layer stays small. The key column should be unique, the feature id column of a GeoPackage for instance. The join is only added when the input is a layer of the project.
+- The slabs may be computed by several worker processes; the order of the objects and the numbering of the slabs stay the same.
+- A streaming mode reads the bounding boxes first, then the features by chunks, with their geometries only when needed to remove blank slabs or to shift the grids, so that memory stays bounded on very large geometries. The peak memory is reported.
+- A pipelined mode reads the features in a thread, ahead of the computation, and writes the slabs in another thread, with bounded queues between them, so that the reading of a database and the writing of the output overlap the computation. Canceling stops the reading, the slabs already computed are written.
+- The buffer may be exact, with a chosen number of segments per quarter circle, built on the object simplified by 5% of the buffer distance, or not built at all: the slabs are then tested by their distance to the object, which gives the true round buffer and is much faster on complex objects.
+- An incremental mode keeps the slabs of every object in a SQLite cache file, with the hash of its geometry and the options: when the layer is computed again with the same options, only the new or modified objects are computed, the others are read from the cache, and the numbering of the slabs stays the same.
+- A result cache folder may be chosen, shared by any project or user: the slabs of a run are stored there in a GeoPackage named by the hash of the fingerprint of the layer (its source, the last modification of its files and its number of features), of the parameters and of the script version, and a run with the same layer and parameters copies them to the output without any computation. Beyond the chosen size, the least recently used results are deleted. Only the layers read from files are cached, not their selected features nor their unsaved edits.
+- A checkpoint file may be chosen for long runs: the slabs are committed to this SQLite file by chunks of features, with the progress (objects and slabs done, last feature id) in the same transaction. When a canceled or crashed run is started again with the same file and options, the committed chunks are read back instead of computed, after checking their features and geometries, and the computation resumes after the last one, with the same numbering of the slabs. The checkpoint of other options, or of a finished run, is started again.
+- A profile of the computation can be reported: the time of every phase (feature fetch, bounding boxes, WKB, buffers, offset search, rectangles, intersection tests, attribute copy, output writing), the GEOS predicate calls, the slabs considered and emitted and the slowest features, in the log and optionally in a JSON file.
 
 """
 
@@ -124,9 +428,53 @@ OVERLAP_MAX = 40
 GAP_DEFAULT = 0
 GAP_MIN = 0
 GAP_MAX = 10
+SOLVER_OPTIONS = ('exact', 'occupancy raster (faster, one raster cell tolerance)', 'vertex breakpoints (ignores the number of attempts)')
+BUFFER_MODE_OPTIONS = ('exact buffer', 'buffer of the simplified object', 'distance test, no buffer (fastest)')
+GRID_MODE_OPTIONS = ('grid centered on every object', 'global grid anchored at the layer extent', 'global grid, every slab written once with the list of its objects', 'clusters of nearby objects sharing a grid, every slab written once with the list of its objects')
+CLUSTER_BLOCK_DEFAULT = 1
+CLUSTER_BLOCK_MIN = 1
+CLUSTER_BLOCK_MAX = 10
+BUFFER_SEGMENTS_MIN = 1
+BUFFER_SEGMENTS_MAX = 100
+WORKERS_DEFAULT = 0
+WORKERS_MIN = 0
+WORKERS_MAX = 128
+BATCH_SIZE_DEFAULT = 1000
+BATCH_SIZE_MIN = 1
+BATCH_SIZE_MAX = 1000000
+STREAMING_DEFAULT = False
+PIPELINE_DEFAULT = False
+CACHE_FILTER = 'SQLite files (*.sqlite)'
+RESULT_CACHE_SIZE_DEFAULT = 1024
+RESULT_CACHE_SIZE_MIN = 1
+RESULT_CACHE_SIZE_MAX = 1000000
+STORED_FID = '_stored_fid'
+PROFILE_DEFAULT = False
+PROFILE_FILTER = 'JSON files (*.json)'
+PROFILE_SLOWEST = 10
+TRANSLATION_FILE = os.path.join(os.path.dirname(__file__), 'i18n', 'minimum_coverage_grid_{}.ts')
+TRANSLATIONS = {}
 
 # error messages
 FIELD_EXISTS_ERR = '\n\nThe "{}" column already exists, change the script code or column name in input table'
+FORMAT_ERR = '\n\nThe slab size "{}" is not valid, write it width x height, both at least {}'
+CHECKPOINT_ERR = '\n\nThe layer does not match the checkpoint file "{}" anymore, delete it to start again'
+
+# information messages
+PREPARED_INFO = 'prepared geometry engine: {} intersection tests in {:.3f} s, about {:.1f}x faster than unprepared tests on a sample object'
+PEAK_MEMORY_INFO = 'peak memory: {:.0f} MB'
+PEAK_MEMORY_WORKERS_INFO = 'peak memory of the largest worker process: {:.0f} MB'
+CACHE_INFO = 'incremental mode: {} objects read from the cache, {} objects computed'
+CHECKPOINT_RESUME_INFO = 'checkpoint: resumed after {} objects and {} slabs (last feature {})'
+CHECKPOINT_INFO = 'checkpoint: {} objects and {} slabs committed'
+RESULT_CACHE_HIT_INFO = 'result cache: the slabs of the same layer and parameters are read from {}'
+RESULT_CACHE_STORE_INFO = 'result cache: the slabs are stored in {}'
+RESULT_CACHE_OFF_INFO = 'result cache: not used, the layer is not read from a file, has unsaved edits or only some of its features are read'
+JOIN_INFO = 'slim output: the columns of "{}" are joined on the "{}" column'
+PROFILE_PHASE_INFO = 'profile: {:<20} {:10.3f} s'
+PROFILE_WORKERS_INFO = 'profile: the computation phases are summed over the {} worker processes'
+PROFILE_COUNT_INFO = 'profile: {} GEOS predicate calls, {} slabs considered, {} slabs emitted'
+PROFILE_SLOWEST_INFO = 'profile: feature {} took {:.3f} s (buffer and offset search)'
 
 class MinimumCoverGrid(QgsProcessingAlgorithm):
     """
@@ -139,15 +487,35 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
     # calling from the QGIS console.
     INPUT = 'input table'
     ORD_FIELD = 'sort column'
+    KEY_FIELD = 'key column of a slim output: only this column of the input table is written, the others are joined'
     SLAB_DX = 'slab\'s width'
     SLAB_DY = 'slab\'s height'
+    FORMATS = 'other slab sizes to try for every object, width x height separated by semicolons (6000x7000; 10000x8500...)'
     OVERLAP = 'buffer percentage around objects'
     SLAB_BOUND = 'add columns containing coordinates of slabs'
     OBJECT_BOUND = 'add columns containing coordinates of bounding boxes'
     NO_BLANK = 'do not keep "white" slabs'
     GAP = 'number of offset attempts to be applied to try to obtain a minimum of slabs (slow!)'
+    SOLVER = 'offset search method'
+    GRID_MODE = 'slab grid'
+    CLUSTER_BLOCK = 'largest extent of a cluster of objects, in slabs'
+    BUFFER_MODE = 'buffer computation'
+    BUFFER_SEGMENTS = 'buffer segments per quarter circle'
+    WORKERS = 'number of worker processes (0: no parallel processing)'
+    BATCH_SIZE = 'number of slabs written to the output at once'
+    STREAMING = 'streaming mode: bounding boxes first, then geometries by chunks only when needed (bounded memory, two passes)'
+    PIPELINE = 'pipelined mode: features read and slabs written in threads, during the computation'
+    CACHE = 'incremental mode: cache file of the slabs, only changed objects are computed again'
+    CHECKPOINT = 'checkpoint file: the slabs are committed by chunks, a canceled or crashed run resumes after the last committed chunk'
+    RESULT_CACHE = 'result cache folder: a run with the same layer and parameters reads the stored slabs, from any project'
+    RESULT_CACHE_SIZE = 'largest size of the result cache folder, in MB (the least recently used results are deleted)'
+    PROFILE = 'profile the computation: time of every phase, GEOS calls and slowest features'
+    PROFILE_FILE = 'profile report (JSON)'
     OUTPUT = 'minimum coverage grid'
 
+    # language of the strings, the one of QGIS when None
+    LOCALE = None
+
     def __init__(self): 
         super().__init__()
 
@@ -156,12 +524,18 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
 
     def tr(self, string):
         """
-        Returns a translatable string with the self.tr() function.
+        Returns a translatable string with the self.tr() function: from the Qt
+        translations installed in QGIS, else from the translation source of
+        the i18n folder.
         """
-        return QCoreApplication.translate(SHORT_NAME_TEXT, string)
+        if self.LOCALE is None:
+            translation = QCoreApplication.translate(SHORT_NAME_TEXT, string)
+            if translation != string:
+                return translation
+        return translations(self.LOCALE or QgsApplication.locale()).get(string, string)
 
     def createInstance(self):
-        return MinimumCoverGrid()
+        return type(self)()
 
     def name(self):
         """
@@ -219,6 +593,11 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
             self.tr(self.ORD_FIELD),
             parentLayerParameterName=self.INPUT,
             optional=True))
+        self.addParameter(QgsProcessingParameterField(
+            self.KEY_FIELD, 
+            self.tr(self.KEY_FIELD),
+            parentLayerParameterName=self.INPUT,
+            optional=True))
         self.addParameter(QgsProcessingParameterNumber(
             self.SLAB_DX, 
             self.tr(self.SLAB_DX), 
@@ -233,6 +612,10 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
             SLAB_DY_DEFAULT,
             False, 
             SLAB_DY_MIN))
+        self.addParameter(QgsProcessingParameterString(
+            self.FORMATS, 
+            self.tr(self.FORMATS), 
+            optional=True))
         self.addParameter(QgsProcessingParameterNumber(
             self.OVERLAP, 
             self.tr(self.OVERLAP), 
@@ -264,6 +647,102 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
             False, 
             GAP_MIN,
             GAP_MAX))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.SOLVER, 
+            self.tr(self.SOLVER), 
+            [self.tr(option) for option in SOLVER_OPTIONS], 
+            False, 
+            SOLVER_EXACT))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.GRID_MODE, 
+            self.tr(self.GRID_MODE), 
+            [self.tr(option) for option in GRID_MODE_OPTIONS], 
+            False, 
+            GRID_CENTERED))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CLUSTER_BLOCK, 
+            self.tr(self.CLUSTER_BLOCK), 
+            QgsProcessingParameterNumber.Integer,  
+            CLUSTER_BLOCK_DEFAULT,
+            False, 
+            CLUSTER_BLOCK_MIN,
+            CLUSTER_BLOCK_MAX))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.BUFFER_MODE, 
+            self.tr(self.BUFFER_MODE), 
+            [self.tr(option) for option in BUFFER_MODE_OPTIONS], 
+            False, 
+            BUFFER_EXACT))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.BUFFER_SEGMENTS, 
+            self.tr(self.BUFFER_SEGMENTS), 
+            QgsProcessingParameterNumber.Integer,  
+            BUFFER_SEGMENTS,
+            False, 
+            BUFFER_SEGMENTS_MIN,
+            BUFFER_SEGMENTS_MAX))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.WORKERS, 
+            self.tr(self.WORKERS), 
+            QgsProcessingParameterNumber.Integer,  
+            WORKERS_DEFAULT,
+            False, 
+            WORKERS_MIN,
+            WORKERS_MAX))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.BATCH_SIZE, 
+            self.tr(self.BATCH_SIZE), 
+            QgsProcessingParameterNumber.Integer,  
+            BATCH_SIZE_DEFAULT,
+            False, 
+            BATCH_SIZE_MIN,
+            BATCH_SIZE_MAX))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.STREAMING, 
+            self.tr(self.STREAMING), 
+            STREAMING_DEFAULT, 
+            False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.PIPELINE, 
+            self.tr(self.PIPELINE), 
+            PIPELINE_DEFAULT, 
+            False))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.CACHE, 
+            self.tr(self.CACHE), 
+            self.tr(CACHE_FILTER), 
+            optional=True, 
+            createByDefault=False))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.CHECKPOINT, 
+            self.tr(self.CHECKPOINT), 
+            self.tr(CACHE_FILTER), 
+            optional=True, 
+            createByDefault=False))
+        self.addParameter(QgsProcessingParameterFile(
+            self.RESULT_CACHE, 
+            self.tr(self.RESULT_CACHE), 
+            behavior=QgsProcessingParameterFile.Folder, 
+            optional=True))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.RESULT_CACHE_SIZE, 
+            self.tr(self.RESULT_CACHE_SIZE), 
+            QgsProcessingParameterNumber.Integer,  
+            RESULT_CACHE_SIZE_DEFAULT,
+            False, 
+            RESULT_CACHE_SIZE_MIN,
+            RESULT_CACHE_SIZE_MAX))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.PROFILE, 
+            self.tr(self.PROFILE), 
+            PROFILE_DEFAULT, 
+            False))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.PROFILE_FILE, 
+            self.tr(self.PROFILE_FILE), 
+            self.tr(PROFILE_FILTER), 
+            optional=True, 
+            createByDefault=False))
         self.addParameter(QgsProcessingParameterFeatureSink(
             self.OUTPUT, 
             self.tr(self.OUTPUT),
@@ -274,16 +753,34 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
         """
         Here is where the processing itself takes place.
         """
+        run_time = perf_counter()
         # retrieve parameters
         source = self.parameterAsSource(parameters, self.INPUT, context)
         ord_field = self.parameterAsFields(parameters, self.ORD_FIELD ,context)
+        key_field = self.parameterAsFields(parameters, self.KEY_FIELD, context)
         slab_dx = self.parameterAsInt(parameters, self.SLAB_DX, context)
         slab_dy = self.parameterAsInt(parameters, self.SLAB_DY, context)
+        formats_text = self.parameterAsString(parameters, self.FORMATS, context)
         overlap = self.parameterAsInt(parameters, self.OVERLAP, context)
         slab_bound = self.parameterAsBool(parameters, self.SLAB_BOUND, context)
         object_bound = self.parameterAsBool(parameters, self.OBJECT_BOUND, context)
         no_blank = self.parameterAsBool(parameters, self.NO_BLANK, context)
         gap = self.parameterAsInt(parameters, self.GAP, context)
+        solver = self.parameterAsEnum(parameters, self.SOLVER, context)
+        grid_mode = self.parameterAsEnum(parameters, self.GRID_MODE, context)
+        cluster_block = self.parameterAsInt(parameters, self.CLUSTER_BLOCK, context)
+        buffer_mode = self.parameterAsEnum(parameters, self.BUFFER_MODE, context)
+        buffer_segments = self.parameterAsInt(parameters, self.BUFFER_SEGMENTS, context)
+        workers = self.parameterAsInt(parameters, self.WORKERS, context)
+        batch_size = self.parameterAsInt(parameters, self.BATCH_SIZE, context)
+        streaming = self.parameterAsBool(parameters, self.STREAMING, context)
+        pipeline = self.parameterAsBool(parameters, self.PIPELINE, context)
+        cache_path = self.parameterAsFileOutput(parameters, self.CACHE, context)
+        checkpoint_path = self.parameterAsFileOutput(parameters, self.CHECKPOINT, context)
+        result_cache_path = self.parameterAsFile(parameters, self.RESULT_CACHE, context)
+        result_cache_size = self.parameterAsInt(parameters, self.RESULT_CACHE_SIZE, context)
+        profile = self.parameterAsBool(parameters, self.PROFILE, context)
+        profile_path = self.parameterAsFileOutput(parameters, self.PROFILE_FILE, context)
 
         # If source was not found, throw an exception to indicate that the algorithm
         # encountered a fatal error. The exception text can be any string, but in this
@@ -292,30 +789,61 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
 
-        # extra fields definition
+        # the slab sizes to try, the slab's width and height first
+        formats = [(slab_dx, slab_dy)]
+        for format_text in (text.strip() for text in formats_text.split(';')):
+            try:
+                format_dx, format_dy = (int(value) for value in format_text.lower().split('x'))
+            except ValueError:
+                format_dx = format_dy = 0
+            if format_text and (format_dx < SLAB_DX_MIN or format_dy < SLAB_DY_MIN):
+                raise QgsProcessingException(self.tr(FORMAT_ERR).format(format_text, min(SLAB_DX_MIN, SLAB_DY_MIN)))
+            if format_text and (format_dx, format_dy) not in formats:
+                formats.append((format_dx, format_dy))
+
+        # extra fields definition, the slabs written once have no original fields
         grid_fields = QgsFields()
-        additional_attributes = ('_id_object', '_id_slab', '_id_object_slab', '_row_object_slab', '_col_object_slab')
-        additional_attributes_ord = ('_ord_object_slab',) if ord_field else ()
+        shared = grid_mode == GRID_SHARED
+        clustered = grid_mode == GRID_CLUSTERED
+        if shared or clustered:
+            if shared:
+                additional_attributes = ('_id_slab', '_row_slab', '_col_slab', '_count_objects')
+            else:
+                additional_attributes = ('_id_cluster', '_id_slab', '_id_cluster_slab', '_row_cluster_slab', '_col_cluster_slab', '_count_objects')
+            additional_attributes_ord = ()
+            additional_attributes_object_bound = ()
+        else:
+            additional_attributes = ('_id_object', '_id_slab', '_id_object_slab', '_row_object_slab', '_col_object_slab')
+            additional_attributes_ord = ('_ord_object_slab',) if ord_field else ()
+            additional_attributes_object_bound = ('_min_x_object', '_max_x_object', '_min_y_object', '_max_y_object') if object_bound else ()
         additional_attributes_slab_bound = ('_min_x_slab', '_max_x_slab', '_min_y_slab', '_max_y_slab') if slab_bound else ()
-        additional_attributes_object_bound = ('_min_x_object', '_max_x_object', '_min_y_object', '_max_y_object') if object_bound else ()
-        for f in source.fields():
+        # the global grid only uses the slab's width and height
+        additional_attributes_format = ('_format_slab',) if len(formats) > 1 and grid_mode in (GRID_CENTERED, GRID_CLUSTERED) else ()
+        # the slim output only keeps the key column
+        kept_fields = [f for f in source.fields() if not key_field or f.name() == key_field[0]] if not (shared or clustered) else []
+        for f in kept_fields:
             grid_fields.append(f)
             field_name = f.name()
             # raise if original fields exist with the same name
             if (field_name in additional_attributes) or \
                (field_name in additional_attributes_ord) or \
                (field_name in additional_attributes_slab_bound) or \
-               (field_name in additional_attributes_object_bound):
-                raise QgsProcessingException(self.tr(FIELD_EXISTS_ERR.format(field_name)))
+               (field_name in additional_attributes_object_bound) or \
+               (field_name in additional_attributes_format):
+                raise QgsProcessingException(self.tr(FIELD_EXISTS_ERR).format(field_name))
         # add extra fields
         for attr in additional_attributes:
             grid_fields.append(QgsField(attr, QVariant.Int))
         for attr in additional_attributes_ord:
             grid_fields.append(QgsField(attr, QVariant.String))
+        if shared or clustered:
+            grid_fields.append(QgsField('_id_objects', QVariant.String))
         for attr in additional_attributes_slab_bound:
             grid_fields.append(QgsField(attr, QVariant.Double))
         for attr in additional_attributes_object_bound:
             grid_fields.append(QgsField(attr, QVariant.Double))
+        for attr in additional_attributes_format:
+            grid_fields.append(QgsField(attr, QVariant.String))
 
         (sink, dest_id) = self.parameterAsSink(parameters, 
                                                 self.OUTPUT, 
@@ -331,130 +859,289 @@ class MinimumCoverGrid(QgsProcessingAlgorithm):
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
 
+        # the output of the same layer, parameters and code is read from the result cache, from any project
+        result_cache = ResultCache(result_cache_path, result_cache_size * 1024 * 1024) if result_cache_path else None
+        result_key = None
+        if result_cache:
+            definition = parameters[self.INPUT]
+            filtered = isinstance(definition, QgsProcessingFeatureSourceDefinition) and \
+                       (definition.selectedFeaturesOnly or getattr(definition, 'featureLimit', -1) != -1 or bool(getattr(definition, 'filterExpression', '')))
+            fingerprint = source_fingerprint(self.parameterAsVectorLayer(parameters, self.INPUT, context), source, filtered)
+            if fingerprint is None:
+                feedback.pushInfo(self.tr(RESULT_CACHE_OFF_INFO))
+            else:
+                result_key = {'source': fingerprint, 
+                              'code': code_version(__file__), 
+                              'parameters': [ord_field, key_field, slab_dx, slab_dy, formats, overlap, slab_bound, object_bound, no_blank, gap, 
+                                             solver, grid_mode, cluster_block, buffer_mode, buffer_segments]}
+        stored_path = result_cache.lookup(result_key) if result_key else None
+        if stored_path:
+            output_features = []
+            for output_feature in stored_features(stored_path, grid_fields):
+                if feedback.isCanceled():
+                    break
+                output_features.append(output_feature)
+                if len(output_features) >= batch_size:
+                    sink.addFeatures(output_features, QgsFeatureSink.FastInsert)
+                    output_features = []
+            sink.addFeatures(output_features, QgsFeatureSink.FastInsert)
+            feedback.pushInfo(self.tr(RESULT_CACHE_HIT_INFO).format(stored_path))
+            self.join_source(parameters, context, feedback, key_field if kept_fields else [], dest_id)
+            return {self.OUTPUT: dest_id}
+        # otherwise the output is also written to a partial file of the result cache, stored when complete
+        partial_path = result_cache.partial() if result_key else None
+        result_writer = stored_writer(partial_path, grid_fields, source.sourceCrs(), context) if partial_path else None
+
         # Compute the number of steps to display within the progress bar and
         # get features from source
         total = 100.0 / source.featureCount() if source.featureCount() else 0
-        features = source.getFeatures()
         current_slab = 0
-        for current, feature in enumerate(features):
-            # Stop the algorithm if cancel button has been clicked
-            if feedback.isCanceled():
-                break
-
-            # Update the progress bar
-            feedback.setProgress(int(current * total))
-
-            # Compute bounding box
-            bounding_geom = feature.geometry().boundingBox()
-            min_x_object = bounding_geom.xMinimum()
-            max_x_object = bounding_geom.xMaximum()
-            min_y_object = bounding_geom.yMinimum()
-            max_y_object = bounding_geom.yMaximum()
-            if overlap > 0:        # if a buffer must extend object
-                buffer_geom = feature.geometry().buffer(overlap / 100.0 * max((max_x_object - min_x_object), (max_y_object - min_y_object)), 10)
-            else:                  # get the feature bounding box
-                buffer_geom = feature.geometry()
-
-            # slabs dimensions
-            object_dx = max_x_object - min_x_object
-            object_dy = max_y_object - min_y_object
-            slab_count_x = max(1, int(ceil(object_dx / slab_dx)))
-            slab_count_y = max(1, int(ceil(object_dy / slab_dy)))
-            center_x = center_of(min_x_object, max_x_object)
-            center_y = center_of(min_y_object, max_y_object)
-            minimum_x_center = center_x - slab_dx * slab_count_x / 2.0
-            minimum_y_center = center_y - slab_dy * slab_count_y / 2.0
-            max_margin_x = slab_count_x * slab_dx - object_dx
-            max_margin_y = slab_count_y * slab_dy - object_dy
-
-            # so as not to move the slabs out of the bounding of the buffered object when calculating the grid moved to limit
-            shift_limit_x = lambda x : -max_margin_x / 2.0 if x < -max_margin_x / 2.0 else x if x < max_margin_x / 2.0 else max_margin_x / 2.0
-            shift_limit_y = lambda y : -max_margin_y / 2.0 if y < -max_margin_y / 2.0 else y if y < max_margin_y / 2.0 else max_margin_y / 2.0
-
-            # can we try to optimize the number of slabs?
-            if slab_count_x * slab_count_y <= 2 or gap == 0: # no optimization possible or desired
-                minimum_ajustment_x_step = 0
-                minimum_ajustment_y_step = 0
-                gap_x = 0
-                gap_y = 0
-            else:
-                # the number of possible offsets is calculated, rounded up to reach the limit
-                half_max_shift_number_x = gap
-                half_max_shift_number_y = gap
-                gap_x = int(ceil(max_margin_x / 2.0 / gap))
-                gap_y = int(ceil(max_margin_y / 2.0 / gap))
-
-                # minimum number of slabs intersecting the object
-                minimum_slab_count = slab_count_x * slab_count_y
-                minimum_ajustment_x_step = 0
-                minimum_ajustment_y_step = 0
-                minimum_balance = 0
-
-                # all possible shifts
-                for ajustment_x_step in range(-gap, gap + 1):
-                    for ajustment_y_step in range(-gap, gap + 1):
-                        intersect_number = 0
-
-                        # search for all slabs if they intersect the buffer
-                        for slab_x in range(slab_count_x):
-                            for slab_y in range(slab_count_y):
-                                rectangle = QgsGeometry.fromRect( \
-                                                QgsRectangle( \
-                                                    minimum_x_center + slab_x * slab_dx + shift_limit_x(ajustment_x_step * gap_x), \
-                                                    minimum_y_center + slab_y * slab_dy + shift_limit_y(ajustment_y_step * gap_y), \
-                                                    minimum_x_center + (slab_x + 1) * slab_dx + shift_limit_x(ajustment_x_step * gap_x), \
-                                                    minimum_y_center + (slab_y + 1) * slab_dy + shift_limit_y(ajustment_y_step * gap_y)))
-
-                                if rectangle.intersects(buffer_geom):
-                                    intersect_number += 1
-
-                        # keep the first minimal value close to the average distance
-                        balance = (ajustment_x_step * gap_x)**2 + (ajustment_y_step * gap_y)**2
-                        if intersect_number < minimum_slab_count or balance < minimum_balance:
-                            minimum_slab_count = intersect_number
-                            minimum_ajustment_x_step = ajustment_x_step
-                            minimum_ajustment_y_step = ajustment_y_step
-                            minimum_balance = balance
-
-            # we found the position of the slabs, we can now create the grid for this object
-            id_object_slab = 0
-            row_object_slab = 0
-            for slab_x in range(slab_count_x):
-                row_object_slab += 1
-                col_object_slab = 0
-                for slab_y in range(slab_count_y):
-                    col_object_slab += 1
-                    # the slab
-                    min_x_slab = minimum_x_center + slab_x * slab_dx + shift_limit_x(minimum_ajustment_x_step * gap_x)
-                    min_y_slab = minimum_y_center + slab_y * slab_dy + shift_limit_y(minimum_ajustment_y_step * gap_y)
-                    max_x_slab = minimum_x_center + (slab_x + 1) * slab_dx + shift_limit_x(minimum_ajustment_x_step * gap_x)
-                    max_y_slab = minimum_y_center + (slab_y + 1) * slab_dy + shift_limit_y(minimum_ajustment_y_step * gap_y)
-                    rectangle = QgsGeometry.fromRect(QgsRectangle(min_x_slab, min_y_slab, max_x_slab, max_y_slab))
+        statistics = new_statistics()
+        # in pipelined mode, the reading and writing threads have their own statistics, merged once they are done
+        read_statistics = new_statistics() if pipeline else statistics
+        write_statistics = new_statistics() if pipeline else statistics
+        # the output features are written by batches of batch_size
+        output_features = []
+        # a partial file with a failed write is not stored, the output itself is still written
+        result_failed = False
+
+        def write(features):
+            nonlocal result_failed
+            start_time = perf_counter()
+            sink.addFeatures(features, QgsFeatureSink.FastInsert)
+            if result_writer and not result_failed:
+                result_failed = not result_writer.addFeatures(features)
+            add_time(write_statistics, 'sink write', start_time)
+
+        # the output features are only timed when profiling, the slowest features are kept as (time, fid)
+        clock = perf_counter if profile else lambda : 0.0
+        rectangle_time = 0.0
+        attribute_time = 0.0
+        slowest = []
+        # the extra fields set for every slab, after the original fields and '_id_object'
+        slab_field = len(kept_fields) + 1
+        slab_field_count = 4 + len(additional_attributes_ord) + len(additional_attributes_slab_bound)
+        template_key = None
 
-                    # intersection with the buffer
-                    if not no_blank or (no_blank and rectangle.intersects(buffer_geom)):
-                        current_slab += 1
-                        id_object_slab += 1
+        # the slabs are computed from the features WKB by chunks, in this process or in worker processes,
+        # the attributes stay here and the results come back in the order of the features
+        # the geometries are only needed to remove blank slabs or to shift the grids,
+        # otherwise the slabs only depend on the bounding boxes and are computed faster here
+        # the slabs of the global grid are not shifted
+        with_geometry = no_blank or ((gap > 0 or solver == SOLVER_BREAKPOINTS) and grid_mode in (GRID_CENTERED, GRID_CLUSTERED))
+        if not with_geometry:
+            workers = 0
+        if clustered:
+            # the clusters are the objects of the grids
+            objects = clustered_objects(source, with_geometry, cluster_block * slab_dx, cluster_block * slab_dy, read_statistics)
+            chunk_bytes = STREAM_CHUNK_BYTES
+        elif streaming:
+            objects = streamed_objects(source, ord_field, with_geometry, read_statistics, key_field)
+            chunk_bytes = STREAM_CHUNK_BYTES
+        else:
+            objects = source_objects(source, ord_field, with_geometry, read_statistics, key_field)
+            chunk_bytes = None
+        # in pipelined mode, the features are read ahead in a thread
+        if pipeline:
+            objects = prefetched(objects, canceled=feedback.isCanceled)
+        options = {'slab_dx': slab_dx, 'slab_dy': slab_dy, 'overlap': overlap, 'no_blank': no_blank, 'gap': gap, 
+                   'solver': solver, 'buffer_mode': buffer_mode, 'buffer_segments': buffer_segments, 'formats': formats, 'profile': profile}
+        # the global grid is anchored at the lower left corner of the layer extent
+        if grid_mode in (GRID_GLOBAL, GRID_SHARED):
+            extent = source.sourceExtent()
+            options['anchor'] = (extent.xMinimum(), extent.yMinimum())
+        # the slabs written once are indexed by their position in the global grid until all the objects are known
+        slabs = SharedSlabs(options['anchor'], slab_dx, slab_dy) if shared else None
+        # the slabs kept between runs also depend on the objects: features or clusters of a given extent
+        kept_options = dict(options, grid_mode=grid_mode, cluster_block=cluster_block)
+        # in incremental mode, only the objects changed since the last run with the same options are computed
+        cache = GridCache(cache_path, kept_options) if cache_path else None
+        # in checkpointed mode, the chunks committed by the previous runs are read back, the next ones are committed
+        checkpoint = Checkpoint(checkpoint_path, kept_options) if checkpoint_path else None
+        # the workers are started once the caches are open, they are stopped in any case
+        pool = process_pool(workers) if workers else None
+        if pool:
+            compute = lambda objects : parallel_grids(pool, workers, objects, options, statistics, chunk_bytes=chunk_bytes)
+        else:
+            compute = lambda objects : serial_grids(objects, options, statistics, chunk_bytes=chunk_bytes)
+        if cache:
+            compute_objects = lambda objects : cached_grids(objects, cache, compute, lambda key : key[4], chunk_bytes=chunk_bytes)
+        else:
+            compute_objects = compute
+        if checkpoint:
+            if checkpoint.resumed_objects:
+                feedback.pushInfo(self.tr(CHECKPOINT_RESUME_INFO).format(checkpoint.resumed_objects, checkpoint.resumed_slabs, checkpoint.last_fid))
+            results = checkpointed_grids(objects, checkpoint, compute_objects, lambda key : key[4], chunk_bytes=chunk_bytes)
+        else:
+            results = compute_objects(objects)
+        # in pipelined mode, the batches are written in a thread
+        writer = PipelineWriter(write) if pipeline else None
+        flush = writer.put if writer else write
+
+        complete = False
+        try:
+            for keys, grid in results:
+                # Stop the algorithm if cancel button has been clicked
+                if feedback.isCanceled():
+                    break
+
+                # Update the progress bar
+                feedback.setProgress(int(keys[-1][0] * total))
+                if 'object_time' in grid:
+                    slowest = heapq.nlargest(PROFILE_SLOWEST, slowest + list(zip(grid['object_time'].tolist(), (key[4] for key in keys))))
+
+                if shared:
+                    slabs.add([keys[id_object][0] for id_object in grid['id_object'].tolist()], grid)
+                    continue
+
+                # we found the position of the slabs of the chunk, we can now create the grid of its objects
+                for id_object, id_object_slab, row_object_slab, col_object_slab, min_x_slab, min_y_slab, max_x_slab, max_y_slab, format_slab in \
+                        zip(*(grid[column].tolist() for column in ('id_object', 'id_object_slab', 'row', 'col', 'min_x', 'min_y', 'max_x', 'max_y', 'format'))):
+                    current_slab += 1
+                    start_time = clock()
+                    rectangle = QgsGeometry.fromRect(QgsRectangle(min_x_slab, min_y_slab, max_x_slab, max_y_slab))
+                    rectangle_end_time = clock()
+                    if clustered:
+                        read, members, id_cluster, bbox, fid = keys[id_object]
+                        attribute_values = [id_cluster, current_slab, id_object_slab, row_object_slab, col_object_slab, len(members), 
+                                            ','.join(str(member) for member in members)]
+                        if slab_bound:
+                            attribute_values.extend([min_x_slab, max_x_slab, min_y_slab, max_y_slab])
+                        if additional_attributes_format:
+                            attribute_values.append('{}x{}'.format(*formats[format_slab]))
                         output_feature = QgsFeature()
-                        output_feature.setGeometry(rectangle)
-                        # original attributs
-                        attribute_values = feature.attributes()[:]                                              
-                        # extra fields
-                        attribute_values.extend([current, current_slab, id_object_slab, row_object_slab, col_object_slab]) 
+                        output_feature.setAttributes(attribute_values)
+                    else:
+                        if keys[id_object] is not template_key:
+                            # the attributes of an object are converted once, in a template feature copied for each of its
+                            # slabs: the copies share the converted attributes, only the values of the slab are set
+                            template_key = keys[id_object]
+                            current, attributes, ord_value, (min_x_object, min_y_object, max_x_object, max_y_object), fid = template_key
+                            template = QgsFeature()
+                            # original attributs, extra fields, values of the slab, bounding box and slab size
+                            template.setAttributes(attributes + [current] + [None] * slab_field_count + 
+                                                   ([min_x_object, max_x_object, min_y_object, max_y_object] if object_bound else []) + 
+                                                   (['{}x{}'.format(*formats[format_slab])] if additional_attributes_format else []))
+                        output_feature = QgsFeature(template)
+                        slab_values = [current_slab, id_object_slab, row_object_slab, col_object_slab]
                         # sort field
                         if ord_field:
-                            attribute_values.append('{}#{:04d}'.format(feature[ord_field[0]], id_object_slab))     
+                            slab_values.append('{}#{:04d}'.format(ord_value, id_object_slab))     
                         # slab's coordinates
                         if slab_bound:
-                            attribute_values.extend([min_x_slab, max_x_slab, min_y_slab, max_y_slab])           
-                        # bounding box
-                        if object_bound:
-                            attribute_values.extend([min_x_object, max_x_object, min_y_object, max_y_object])           
+                            slab_values.extend([min_x_slab, max_x_slab, min_y_slab, max_y_slab])           
+                        for index, value in enumerate(slab_values, slab_field):
+                            output_feature.setAttribute(index, value)
 
-                        # add fields and geom
-                        output_feature.setAttributes(attribute_values)
-                        sink.addFeature(output_feature, QgsFeatureSink.FastInsert)
+                    # add geom
+                    output_feature.setGeometry(rectangle)
+                    output_features.append(output_feature)
+                    rectangle_time += rectangle_end_time - start_time
+                    attribute_time += clock() - rectangle_end_time
+                    if len(output_features) >= batch_size:
+                        flush(output_features)
+                        output_features = []
+
+            # the slabs written once, when all the objects are known
+            for row_slab, col_slab, min_x_slab, min_y_slab, max_x_slab, max_y_slab, id_objects in (slabs if shared and not feedback.isCanceled() else ()):
+                current_slab += 1
+                start_time = clock()
+                output_feature = QgsFeature()
+                output_feature.setGeometry(QgsGeometry.fromRect(QgsRectangle(min_x_slab, min_y_slab, max_x_slab, max_y_slab)))
+                rectangle_end_time = clock()
+                attribute_values = [current_slab, row_slab, col_slab, len(id_objects), ','.join(str(id_object) for id_object in id_objects)]
+                if slab_bound:
+                    attribute_values.extend([min_x_slab, max_x_slab, min_y_slab, max_y_slab])
+                output_feature.setAttributes(attribute_values)
+                output_features.append(output_feature)
+                rectangle_time += rectangle_end_time - start_time
+                attribute_time += clock() - rectangle_end_time
+                if len(output_features) >= batch_size:
+                    flush(output_features)
+                    output_features = []
+
+            # the last batch
+            flush(output_features)
+            complete = not feedback.isCanceled()
+        except CheckpointError:
+            # in pipelined mode, the reading stops when canceled
+            if not feedback.isCanceled():
+                raise QgsProcessingException(self.tr(CHECKPOINT_ERR).format(checkpoint_path))
+        finally:
+            results.close()
+            objects.close()
+            if writer:
+                writer.close()
+            if pipeline:
+                merge_statistics(statistics, read_statistics)
+                merge_statistics(statistics, write_statistics)
+            if partial_path:
+                # the writer is closed when released
+                stored = complete and result_writer is not None and not result_failed and \
+                         result_writer.hasError() == QgsVectorFileWriter.NoError
+                result_writer = None
+                if stored:
+                    result_cache.store(result_key, partial_path)
+                    feedback.pushInfo(self.tr(RESULT_CACHE_STORE_INFO).format(result_cache.path(result_key)))
+                else:
+                    result_cache.discard(partial_path)
+            if pool:
+                pool.shutdown()
+            if cache:
+                cache.close()
+            if checkpoint:
+                # a finished run is not resumed, the next one starts again
+                if complete:
+                    checkpoint.finish()
+                checkpoint.close()
+
+        if statistics['prepared_tests']:
+            feedback.pushInfo(self.tr(PREPARED_INFO).format(statistics['prepared_tests'], statistics['prepared_time'], statistics['prepared_speedup']))
+
+        if cache:
+            feedback.pushInfo(self.tr(CACHE_INFO).format(cache.hits, cache.misses))
+
+        if checkpoint:
+            feedback.pushInfo(self.tr(CHECKPOINT_INFO).format(checkpoint.objects, checkpoint.slabs))
+
+        if profile:
+            statistics['times']['output rectangles'] = rectangle_time
+            statistics['times']['attribute copy'] = attribute_time
+            statistics['times']['total'] = perf_counter() - run_time
+            for phase, seconds in sorted(statistics['times'].items(), key=lambda item : -item[1]):
+                feedback.pushInfo(self.tr(PROFILE_PHASE_INFO).format(phase, seconds))
+            if workers:
+                feedback.pushInfo(self.tr(PROFILE_WORKERS_INFO).format(workers))
+            feedback.pushInfo(self.tr(PROFILE_COUNT_INFO).format(statistics['tests'], statistics['slabs_considered'], statistics['slabs_emitted']))
+            for seconds, fid in slowest:
+                feedback.pushInfo(self.tr(PROFILE_SLOWEST_INFO).format(fid, seconds))
+            if profile_path:
+                with open(profile_path, 'w') as profile_file:
+                    json.dump({'times': statistics['times'], 
+                               'workers': workers, 
+                               'geos_predicate_calls': statistics['tests'], 
+                               'slabs_considered': statistics['slabs_considered'], 
+                               'slabs_emitted': statistics['slabs_emitted'], 
+                               'slowest_features': [{'fid': fid, 'seconds': seconds} for seconds, fid in slowest]}, 
+                              profile_file, indent=2)
+
+        if streaming and peak_memory():
+            feedback.pushInfo(self.tr(PEAK_MEMORY_INFO).format(peak_memory()[0]))
+            if workers:
+                feedback.pushInfo(self.tr(PEAK_MEMORY_WORKERS_INFO).format(peak_memory()[1]))
+
+        self.join_source(parameters, context, feedback, key_field if kept_fields else [], dest_id)
 
         return {self.OUTPUT: dest_id}
 
+    def join_source(self, parameters, context, feedback, key_field, dest_id):
+        """
+        Joins the other columns of the input layer to the slim output on the
+        key column, once the output is loaded in the project.
+        """
+        source_layer = self.parameterAsVectorLayer(parameters, self.INPUT, context) if key_field else None
+        if source_layer is not None and context.willLoadLayerOnCompletion(dest_id):
+            context.layerToLoadOnCompletionDetails(dest_id).setPostProcessor(SourceJoin.create(source_layer.id(), key_field[0]))
+            feedback.pushInfo(self.tr(JOIN_INFO).format(source_layer.name(), key_field[0]))
+
 # That's all folks!